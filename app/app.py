@@ -1,9 +1,9 @@
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from typing import List, Optional
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 import asyncio
 import os
+import anyio
 from contextlib import asynccontextmanager
 
 # Load environment variables
@@ -12,32 +12,44 @@ load_dotenv()
 # Import routes
 from app.routes import general, docker, workspaces, jobs, logs, stats, vm
 
-# Import models and repositories
-from app.models.workspace import UserWorkspace
-from app.models.job import TriggeredJob
-from app.repositories.workspace_repository import WorkspaceRepository
-from app.repositories.job_repository import JobRepository
-
 # Import log watcher manager
 from app.workspace_monitoring.log_watcher_manager import log_watcher_manager
+from app.workspace_monitoring.compose_log_watcher import stop_shared_watcher
 from app.custom_logging import logger
 from app.auth_middleware import AuthMiddleware
+from app.base_agent.helper_functions import get_llm_warmup_urls, warm_up_connection
+from app.database import client as mongo_client
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting application...")
+    # Sync FastAPI endpoints and run_in_threadpool share anyio's thread limiter;
+    # raise its default of 40 so they don't queue behind each other. (asyncio.to_thread
+    # uses the event loop's default executor and is not affected by this limit.)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 200
+    try:
+        await mongo_client.admin.command('ping')
+        logger.info("Successfully connected to MongoDB")
+    except Exception as e:
+        logger.error(f"Failed to connect to MongoDB: {str(e)}")
     await log_watcher_manager.initialize()
+    try:
+        await asyncio.gather(*(asyncio.to_thread(warm_up_connection, url) for url in get_llm_warmup_urls()))
+    except Exception as e:
+        logger.warning(f"LLM connection warm-up skipped: {str(e)}")
     yield
     # Shutdown
     logger.info("Shutting down application...")
     await log_watcher_manager.shutdown()
+    stop_shared_watcher()
 
 # Initialize FastAPI app with lifespan events
 app = FastAPI(
     title="Deployment Manager API",
     description="API for managing deployments and running Docker commands",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -45,10 +57,6 @@ app = FastAPI(
 app.add_middleware(AuthMiddleware)
 
 # Include routers from route modules
-app.include_router(general.router)
-app.include_router(docker.router)
-app.include_router(workspaces.router)
-app.include_router(jobs.router)
-app.include_router(logs.router)
-app.include_router(stats.router)
-app.include_router(vm.router)
+for route_module in (general, docker, workspaces, jobs, logs, stats, vm):
+    app.include_router(route_module.router)
+
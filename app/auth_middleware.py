@@ -1,22 +1,45 @@
 import os
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from dotenv import load_dotenv
-# Load environment variables
-load_dotenv()
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
 from app.custom_logging import logger
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # List of public paths that do not require authentication
-        public_paths = ['/', '/health', '/docs', '/openapi.json']
-        if request.url.path in public_paths:
-            return await call_next(request)
-        auth_token = os.getenv("AUTH_TOKEN")
-        headers_lower = {k.lower(): v for k, v in request.headers.items()}
-        header_token = headers_lower.get("authorization")
-        if not auth_token or header_token != auth_token:
+
+# Read once at startup; the token does not change while the process runs
+AUTH_TOKEN = os.getenv("AUTH_TOKEN")
+_AUTH_TOKEN_BYTES = AUTH_TOKEN.encode("latin-1") if AUTH_TOKEN else None
+# Paths that do not require authentication
+PUBLIC_PATHS = frozenset({'/', '/health', '/docs', '/openapi.json', '/redoc'})
+UNAUTHORIZED_BODY = orjson.dumps({"detail": "Unauthorized"})
+
+class AuthMiddleware:
+    """
+    Pure ASGI middleware that checks the Authorization header against AUTH_TOKEN.
+
+    Implemented without BaseHTTPMiddleware so that authenticated requests are
+    passed straight through to the app without extra Request/Response objects.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in PUBLIC_PATHS:
+            await self.app(scope, receive, send)
+            return
+        # ASGI header names are already lowercased bytes
+        header_token = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                header_token = value
+                break
+        if not _AUTH_TOKEN_BYTES or header_token != _AUTH_TOKEN_BYTES:
             logger.warning("Unauthorized access attempt")
-            return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
-        response = await call_next(request)
-        return response
+            await send({
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(UNAUTHORIZED_BODY)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": UNAUTHORIZED_BODY})
+            return
+        await self.app(scope, receive, send)
@@ -1,42 +1,73 @@
 import os
+import atexit
+import functools
+import httpx
 from openai import OpenAI
 import anthropic
 from azure.ai.inference import ChatCompletionsClient
 from azure.core.credentials import AzureKeyCredential
-from dotenv import load_dotenv
 import re
-load_dotenv()
 from app.custom_logging import logger
 import traceback
 from openai import AzureOpenAI
 
- 
+# Shared HTTP connection pool for the OpenAI/Azure OpenAI/Anthropic clients
+_HTTPX = httpx.Client(
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=50, keepalive_expiry=30)
+)
+atexit.register(_HTTPX.close)
+
+def get_llm_warmup_urls():
+    """Return the endpoints of the LLM providers configured in the environment"""
+    urls = []
+    if os.environ.get('OPENAI_API_KEY'):
+        urls.append("https://api.openai.com/v1/models")
+    if os.environ.get('ANTHROPIC_API_KEY'):
+        urls.append("https://api.anthropic.com/v1/models")
+    for endpoint_var in ("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_DALLE_ENDPOINT"):
+        if os.environ.get(endpoint_var):
+            urls.append(os.environ[endpoint_var])
+    return urls
+
+def warm_up_connection(url: str):
+    """Open a pooled connection to url so the first real request skips the TCP/TLS handshake"""
+    try:
+        _HTTPX.head(url, timeout=5)
+    except Exception as e:
+        logger.warning(f"Connection warm-up failed for {url}: {str(e)}")
+
+@functools.lru_cache(maxsize=1)
 def get_openai_client():
-    load_dotenv()
-    client = OpenAI(api_key = os.environ['OPENAI_API_KEY'], organization = os.environ['OPENAI_API_ORG'])
+    client = OpenAI(api_key = os.environ['OPENAI_API_KEY'], organization = os.environ['OPENAI_API_ORG'], http_client=_HTTPX)
     return client
 
+@functools.lru_cache(maxsize=1)
 def get_azure_opensource_client():
     client = ChatCompletionsClient(endpoint=os.environ['AZURE_ENDPOINT'], 
                                    credential=AzureKeyCredential(os.environ["AZUREAI_ENDPOINT_KEY"]))
     return client
 
+@functools.lru_cache(maxsize=1)
 def get_claude_client():
-    client = anthropic.Anthropic(api_key=os.environ['ANTHROPIC_API_KEY'])
+    client = anthropic.Anthropic(api_key=os.environ['ANTHROPIC_API_KEY'], http_client=_HTTPX)
     return client
 
+@functools.lru_cache(maxsize=1)
 def get_openai_azure_client():
     client = AzureOpenAI(  
         azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],  
         api_key=os.environ["AZUREAI_ENDPOINT_KEY"],  
         api_version="2024-12-01-preview",
+        http_client=_HTTPX,
     )
     return client 
 
+@functools.lru_cache(maxsize=1)
 def get_openai_azure_dalle_client():
     client = AzureOpenAI(
         azure_endpoint=os.environ["AZURE_OPENAI_DALLE_ENDPOINT"],
         api_key=os.environ["AZURE_OPENAI_DALLE_KEY"],
-        api_version="2024-02-01"
+        api_version="2024-02-01",
+        http_client=_HTTPX
     )
     return client
\ No newline at end of file
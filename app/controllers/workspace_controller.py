@@ -2,9 +2,9 @@ from typing import List, Dict, Optional
 from app.models.workspace import UserWorkspace
 from app.repositories.workspace_repository import WorkspaceRepository
 from app.docker.zip_utils import ZipUtils
-from app.docker.docker_compose_utils import DockerComposeUtils
 from app.docker.docker_compose_remote_vm_utils import DockerComposeRemoteVMUtils
 import os
+import asyncio
 import tempfile
 import shutil
 from app.custom_logging import logger
@@ -77,52 +77,69 @@ class WorkspaceController:
         except Exception as e:
             raise WorkspaceUpdateFailedException(f"Failed to update workspace: {str(e)}")
 
+    @staticmethod
+    def _stop_log_watcher(project_name: str, username: str, workspace_name: str) -> None:
+        """Stop any active log watcher for the workspace. Failures are logged, never raised."""
+        try:
+            # Stop log watcher if the manager is initialized
+            if log_watcher_manager._initialized and log_watcher_manager._log_handler:
+                if project_name in log_watcher_manager._log_handler.log_watchers:
+                    logger.info("Stopping log watcher for workspace deletion: %s/%s", username, workspace_name)
+                    log_watcher_manager._log_handler._cleanup_process(project_name)
+                    
+        except Exception as e:
+            logger.warning("Error stopping log watcher during workspace deletion: %s", e)
+            # Don't fail the deletion if log watcher cleanup fails
+
+    @staticmethod
+    async def _bring_down_containers(workspace: UserWorkspace, username: str, workspace_name: str) -> None:
+        """Stop and remove the workspace containers. Failures are logged, never raised."""
+        try:
+            # Use remote VM utils for workspaces with VM configuration
+            logger.info("Using remote VM Docker compose down for workspace: %s/%s", username, workspace_name)
+            await DockerComposeRemoteVMUtils.run_docker_compose_down(
+                project_path=workspace.workspace_path,
+                username=username,
+                workspace_name=workspace_name
+            )
+        except Exception as e:
+            logger.error("Error cleaning up containers: %s", e)
+
+    @staticmethod
+    async def _remove_workspace_files(workspace_path: str) -> None:
+        """Remove the workspace directory if it exists"""
+        if os.path.exists(workspace_path):
+            await asyncio.to_thread(shutil.rmtree, workspace_path)
+
     @staticmethod
     async def delete_workspace(username: str, workspace_name: str) -> Dict:
         """Delete a workspace and its resources"""
         try:
-            logger.info(f"Starting workspace deletion for: {username}/{workspace_name}")
+            logger.info("Starting workspace deletion for: %s/%s", username, workspace_name)
             # Get workspace details first
             workspace = await WorkspaceRepository.get_workspace(username, workspace_name)
             if not workspace:
                 raise WorkspaceNotFoundException(f"Workspace {workspace_name} not found for user {username}")
 
-            logger.info(f"Found workspace with VM config: {workspace.vm_config is not None}")
+            logger.info("Found workspace with VM config: %s", workspace.vm_config is not None)
             if workspace.vm_config:
-                logger.info(f"VM config details - IP: {workspace.vm_config.private_ip}, Status: {workspace.vm_config.status}")
+                logger.info("VM config details - IP: %s, Status: %s", workspace.vm_config.private_ip, workspace.vm_config.status)
 
-            # Stop any active log watchers for this workspace
-            try:
-                project_name = generate_project_name_from_user_workspace(username, workspace_name)
-                
-                # Stop log watcher if the manager is initialized
-                if log_watcher_manager._initialized and log_watcher_manager._log_handler:
-                    if project_name in log_watcher_manager._log_handler.log_watchers:
-                        logger.info(f"Stopping log watcher for workspace deletion: {username}/{workspace_name}")
-                        log_watcher_manager._log_handler._cleanup_process(project_name)
-                        
-            except Exception as e:
-                logger.warning(f"Error stopping log watcher during workspace deletion: {str(e)}")
-                # Don't fail the deletion if log watcher cleanup fails
+            # Workspaces created before project_name was stored don't have it yet
+            project_name = workspace.project_name or generate_project_name_from_user_workspace(username, workspace_name)
 
-            # Stop and remove any running containers
+            # Stopping the log watcher and bringing down the containers are independent
+            await asyncio.gather(
+                asyncio.to_thread(WorkspaceController._stop_log_watcher, project_name, username, workspace_name),
+                WorkspaceController._bring_down_containers(workspace, username, workspace_name)
+            )
+
+            # Remove workspace files; the database record is only deleted once they are
+            # gone, so a failed delete can be retried
             try:
-                # Use remote VM utils for workspaces with VM configuration
-                logger.info(f"Using remote VM Docker compose down for workspace: {username}/{workspace_name}")
-                await DockerComposeRemoteVMUtils.run_docker_compose_down(
-                    project_path=workspace.workspace_path,
-                    username=username,
-                    workspace_name=workspace_name
-                )
+                await WorkspaceController._remove_workspace_files(workspace.workspace_path)
             except Exception as e:
-                logger.error(f"Error cleaning up containers: {str(e)}")
-
-            # Remove workspace files
-            if os.path.exists(workspace.workspace_path):
-                try:
-                    shutil.rmtree(workspace.workspace_path)
-                except Exception as e:
-                    raise Exception(f"Failed to remove workspace files: {str(e)}")
+                raise Exception(f"Failed to remove workspace files: {str(e)}")
 
             # Finally delete from database
             deleted = await WorkspaceRepository.delete_workspace(username, workspace_name)
@@ -139,27 +156,30 @@ class WorkspaceController:
     async def upload_workspace(username: str, workspace_name: str, zip_file, docker_image_name: Optional[str] = None) -> UploadWorkspaceResult:
         """Upload and extract a workspace from a zip file"""
         try:
-            # Check if workspace exists
-            workspace = await WorkspaceRepository.get_workspace(username, workspace_name)
-            
-            # Create a temporary file to store the uploaded zip
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
-                temp_path = temp_file.name
-            
-            # Save the uploaded file to the temporary file
-            with open(temp_path, 'wb') as f:
-                shutil.copyfileobj(zip_file.file, f)
-            
-            # Extract the zip file
-            destination_path = ZipUtils.extract_zip_file(temp_path, username, workspace_name)
-            # Clean up the temporary file
-            os.unlink(temp_path)
+            # Check if workspace exists while the upload is written and extracted
+            workspace_task = asyncio.create_task(WorkspaceRepository.get_workspace(username, workspace_name))
+            try:
+                # Create a temporary file to store the uploaded zip
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
+                    temp_path = temp_file.name
+                
+                # Save the uploaded file to the temporary file
+                await asyncio.to_thread(ZipUtils.save_uploaded_file, zip_file.file, temp_path)
+                
+                # Extract the zip file
+                destination_path = await asyncio.to_thread(ZipUtils.extract_zip_file, temp_path, username, workspace_name)
+                # Clean up the temporary file
+                await asyncio.to_thread(os.unlink, temp_path)
+            except Exception:
+                workspace_task.cancel()
+                raise
+            workspace = await workspace_task
 
             # If workspace doesn't exist, create it
             if not workspace:
                 new_workspace = UserWorkspace(username=username, workspace_name=workspace_name, workspace_path=destination_path)
                 await WorkspaceRepository.create_workspace(new_workspace)
-                logger.info(f"Created new workspace: {username}/{workspace_name}")
+                logger.info("Created new workspace: %s/%s", username, workspace_name)
             else:
                 # Update existing workspace path
                 await WorkspaceRepository.update_workspace(
@@ -167,7 +187,7 @@ class WorkspaceController:
                     workspace_name=workspace_name,
                     update_data={"workspace_path": destination_path}
                 )
-                logger.info(f"Updated existing workspace: {username}/{workspace_name}")
+                logger.info("Updated existing workspace: %s/%s", username, workspace_name)
             return UploadWorkspaceResult(
                 status="success",
                 message="Workspace uploaded and extracted successfully",
@@ -1,6 +1,12 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
+
+# Background listeners that write queued records and the QueueHandlers feeding
+# them, keyed by logger name
+_listeners = {}
 
 def setup_logger(log_name='app', log_level=logging.INFO):
     """
@@ -13,29 +19,33 @@ def setup_logger(log_name='app', log_level=logging.INFO):
     Returns:
         logger: Configured logger instance
     """
-    # Create logs directory if it doesn't exist
-    log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
     # Create logger
     logger = logging.getLogger(log_name)
     logger.setLevel(log_level)
 
+    # Already configured by an earlier call; don't build (and leak) new handlers
+    if logger.handlers:
+        return logger
+
     # Prevent logging from propagating to the root logger
     logger.propagate = False
 
+    # Create logs directory if it doesn't exist
+    log_dir = 'logs'
+    os.makedirs(log_dir, exist_ok=True)
+
     # Create formatters
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
 
-    # Create and set up file handler (rotating log files)
-    file_handler = RotatingFileHandler(
+    # Create and set up file handler (hourly rotating log files; unlike size-based
+    # rotation this does not stat the file on every record)
+    file_handler = TimedRotatingFileHandler(
         os.path.join(log_dir, f'{log_name}.log'),
-        maxBytes=10485760,  # 10MB
-        backupCount=5
+        when='H',
+        backupCount=24
     )
     file_handler.setFormatter(formatter)
     file_handler.setLevel(log_level)
@@ -45,12 +55,33 @@ def setup_logger(log_name='app', log_level=logging.INFO):
     console_handler.setFormatter(formatter)
     console_handler.setLevel(log_level)
 
-    # Add handlers to logger if they haven't been added already
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+    # The logger only enqueues records (QueueHandler still formats the message in
+    # the calling thread); a background listener thread does the file/console I/O
+    # so callers never block on it.
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    queue_handler = QueueHandler(log_queue)
+    _listeners[log_name] = (listener, queue_handler)
+    logger.addHandler(queue_handler)
 
     return logger
 
+def stop_log_listeners():
+    """
+    Flush any queued log records and stop the background listener threads. The
+    loggers then write to the file/console handlers directly, so records logged
+    afterwards (e.g. by later atexit work) are not lost in an undrained queue.
+    """
+    while _listeners:
+        log_name, (listener, queue_handler) = _listeners.popitem()
+        logger = logging.getLogger(log_name)
+        logger.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            logger.addHandler(handler)
+
+atexit.register(stop_log_listeners)
+
 # Create default logger instance
 logger = setup_logger()
\ No newline at end of file
@@ -1,15 +1,11 @@
 import os
 import motor.motor_asyncio
-from dotenv import load_dotenv
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
 # Get MongoDB URL from environment variables
 MONGODB_URL = os.getenv("MONGODB_URL")
 DATABASE_NAME = os.getenv("DATABASE", "deployment_manager")
@@ -27,15 +23,17 @@ else:
 
 try:
     # Create a client instance
+    # The connection itself is verified with a ping during application startup
     client = motor.motor_asyncio.AsyncIOMotorClient(
         MONGODB_URL,
-        serverSelectionTimeoutMS=5000  # 5 second timeout
+        serverSelectionTimeoutMS=5000,  # 5 second timeout
+        maxPoolSize=200,
+        minPoolSize=20,  # Keep warm connections for cold requests
+        maxIdleTimeMS=30000,
+        waitQueueTimeoutMS=5000,
+        compressors='zstd,zlib'  # Wire compression, negotiated with the server
     )
     
-    # Verify the connection
-    client.admin.command('ping')
-    logger.info("Successfully connected to MongoDB")
-    
     # Get database instance
     db = client[DATABASE_NAME]
     
@@ -44,5 +42,5 @@ try:
     job_collection = db.triggered_jobs
     
 except Exception as e:
-    logger.error(f"Failed to connect to MongoDB: {str(e)}")
+    logger.error(f"Failed to create MongoDB client: {str(e)}")
     raise
\ No newline at end of file
@@ -1,26 +1,32 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Final
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Resolved once at import; the environment doesn't change while the process runs
+# Base directory for project files
+# Default is /app/docker/deployments, but can be overridden with DOCKER_BASE_DIR env var
+BASE_DIR: Final[str] = os.getenv("DOCKER_BASE_DIR", "/app/docker/deployments")
+# BASE_DIR without a trailing separator, for building project paths
+_BASE_DIR_PREFIX: Final[str] = BASE_DIR.rstrip(os.sep)
+
 class DockerConfig:
     """Configuration for Docker-related operations"""
     
     # Base directory for project files
-    # Default is /deployments, but can be overridden with DOCKER_BASE_DIR env var
-    BASE_DIR = os.getenv("DOCKER_BASE_DIR", "/app/docker/deployments")
+    BASE_DIR: Final[str] = BASE_DIR
     
     # Default port range for container mapping
-    BASE_PORT = int(os.getenv("DOCKER_BASE_PORT", "8000"))
-    MAX_PORT_OFFSET = int(os.getenv("DOCKER_MAX_PORT_OFFSET", "1000"))
+    BASE_PORT: Final[int] = int(os.getenv("DOCKER_BASE_PORT", "8000"))
+    MAX_PORT_OFFSET: Final[int] = int(os.getenv("DOCKER_MAX_PORT_OFFSET", "1000"))
     
     # Network configuration
-    DOCKER_NETWORK = os.getenv("DOCKER_NETWORK", "traefik-public")
+    DOCKER_NETWORK: Final[str] = os.getenv("DOCKER_NETWORK", "traefik-public")
     
     # Domain configuration
-    BASE_DOMAIN = os.getenv("DOCKER_BASE_DOMAIN", "synergiqai.com")
+    BASE_DOMAIN: Final[str] = os.getenv("DOCKER_BASE_DOMAIN", "synergiqai.com")
     
     @staticmethod
     def get_project_dir(user_name: str, project_name: str) -> str:
@@ -34,4 +40,4 @@ class DockerConfig:
         Returns:
             str: Full path to the project directory
         """
-        return os.path.join(DockerConfig.BASE_DIR, user_name, project_name)
\ No newline at end of file
+        return f"{_BASE_DIR_PREFIX}{os.sep}{user_name}{os.sep}{project_name}"
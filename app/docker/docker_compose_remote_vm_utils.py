@@ -1,16 +1,19 @@
-import os
-from .helper_functions import generate_unique_name, extract_username_and_workspace_from_path
+import asyncio
+import copy
+import shlex
+import tempfile
+from .helper_functions import generate_unique_name, extract_username_and_workspace_from_path, map_project_path_to_volume
 from app.custom_logging import logger
 from .utils import DockerUtils
 from .docker_log_handler import DockerCommandWithLogHandler, CommandResult, DockerComposeLogHandler
 import traceback
-import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 import json
 from app.docker.docker_context_manager import DockerContextManager
 from .services_ports_identifier import ServicesPortsIdentifier
+from .fluentd_enabler import fluentd_enabler
 from app.vm_manager.traefik_toml_generator import TraefikTomlGenerator
-from app.models.results.docker_operation_results import DockerOperationResult, DockerOperationType
+from app.models.results.docker_operation_results import DockerOperationResult, DockerOperationType, DockerContextResult
 from app.models.exceptions.known_exceptions import (
     DockerComposeFileNotFoundException,
     DockerComposeBuildFailedException,
@@ -20,6 +23,7 @@ from app.models.exceptions.known_exceptions import (
     DockerComposeSystemCleanupFailedException,
     DockerContextSetException
     )
+
 class DockerComposeRemoteVMUtils:
     """
     Utilities for deploying and managing Docker Compose projects on a remote VM using Docker contexts.
@@ -27,15 +31,14 @@ class DockerComposeRemoteVMUtils:
     @staticmethod
     async def run_docker_compose_down(project_path, username, workspace_name) -> DockerOperationResult:
         try:
-            service_name = generate_unique_name(project_base_path=project_path, username=username)
+            container_name = generate_unique_name(project_base_path=project_path, username=username)
             traefik_gen = TraefikTomlGenerator()
-            # Delete the TOML file for the service
-            traefik_gen.delete_toml(service_name)
+            # Delete the TOML file for the service (named after the compose project)
+            traefik_gen.delete_toml(container_name)
             docker_context_result = await DockerContextManager.set_context_for_user_workspace(username, workspace_name)
-            container_name = generate_unique_name(project_base_path=project_path, username=username)
             compose_file = DockerComposeRemoteVMUtils.get_compose_file_path(project_path=project_path)
-            cmd = f'docker --context {docker_context_result.context_name} compose -f {compose_file} -p {container_name} down'
-            result = DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging(cmd, container_name=container_name)
+            cmd = ["docker", "--context", docker_context_result.context_name, "compose", "-f", compose_file, "-p", container_name, "down"]
+            result = await DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging_async(cmd, container_name=container_name)
             if result.success:
                 logger.info(f"Docker Compose project {container_name} brought down successfully.")
                 return DockerOperationResult(success=True, message=f"Docker Compose project {container_name} brought down successfully.", operation=DockerOperationType.DOWN)
@@ -61,7 +64,7 @@ class DockerComposeRemoteVMUtils:
                 context_name=context.context_name
             )
             cmd_handler = DockerCommandWithLogHandler(project_path)
-            result = cmd_handler.run_docker_commands_with_logging(cmd, container_name=container_name)
+            result = await cmd_handler.run_docker_commands_with_logging_async(cmd, container_name=container_name)
             return DockerOperationResult(
                 success=result.success,
                 message=result.output if result.success else None,
@@ -72,72 +75,109 @@ class DockerComposeRemoteVMUtils:
             logger.error(f"Failed to set Docker context: {traceback.format_exc()}")
             raise DockerComposeBuildFailedException("Failed to build the project") from e
         except Exception as e:
-            logger.error(f"Error during Docker Compose build: {traceback.format_exc()}")
-            raise DockerComposeBuildFailedException(f"Error during Docker Compose build: {traceback.format_exc()}") from e
+            error_msg = f"Error during Docker Compose build: {traceback.format_exc()}"
+            logger.error(error_msg)
+            raise DockerComposeBuildFailedException(error_msg) from e
 
     @staticmethod
     def get_compose_file_path(project_path: str) -> str:
         """
         Get the path to the docker-compose.yml file in the project directory.
+
+        The project tree is only walked again when the project directory changes
+        or the previously found file has disappeared.
         
         Args:
             project_path: Path to the project directory
         Returns:
             The path to the docker-compose.yml file
         """
-        compose_file_name = DockerUtils.get_service_paths(project_path=project_path, only_compose=True)[0]
-        compose_file_path = os.path.join(project_path, compose_file_name)
-        if not os.path.exists(compose_file_path):
-            raise FileNotFoundError(f"Docker Compose file not found at {compose_file_path}")
-        return compose_file_path
+        return DockerUtils.get_compose_file_path(project_path)
     
     @staticmethod
     def read_compose_file(compose_file_path: str) -> Dict[str, Any]:
         """
         Read the docker-compose.yml file and return its contents as a dictionary.
+
+        The parsed file is cached until the file changes; callers get their own copy.
         
         Args:
-            project_path: Path to the project directory
+            compose_file_path: Path to the docker-compose.yml file
         """
-        with open(compose_file_path, 'r') as file:
-            return yaml.safe_load(file)
-        raise FileNotFoundError(f"Docker Compose file not found at {compose_file_path}")
+        return copy.deepcopy(DockerUtils.read_compose_file(compose_file_path))
 
     @staticmethod
-    def _retrieve_external_service_ports(project_path: str) -> Optional[Dict[str, Any]]:
+    def write_compose_file(compose_file_path: str, compose_content: Dict[str, Any]) -> None:
         """
-        Extract external service ports from the docker-compose file in the project directory.
+        Write compose content back to the docker-compose.yml file.
+        
         Args:
-            project_path: Path to the project directory
+            compose_file_path: Path to the docker-compose.yml file
+            compose_content: Compose content to write
+        """
+        DockerUtils.write_compose_file(compose_file_path, compose_content, indent=2)
+
+    @staticmethod
+    def _retrieve_external_service_ports(compose_content: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Extract external service ports from the parsed docker-compose file.
+        Args:
+            compose_content: Parsed docker-compose content
         Returns:
             A dictionary mapping external service names to their ports, or None if no ports are found
         """
 
         services_ports_identifier = ServicesPortsIdentifier()
-        compose_content = DockerComposeRemoteVMUtils.read_compose_file(
-            compose_file_path=DockerComposeRemoteVMUtils.get_compose_file_path(project_path=project_path)
-        )
         services_ports = services_ports_identifier.identify_external_servicesports(docker_compose=compose_content)
         if not services_ports:
             raise ValueError("No external services ports found in the docker-compose file.")
         return services_ports
 
+    @staticmethod
+    def _prepare_compose_file(project_path: str, username: str, workspace_name: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Locate and parse the compose file once, identify the external service ports,
+        enable Fluentd logging and write the file back once.
+        
+        Args:
+            project_path: Path to the project directory
+            username: Username for the Fluentd log tag
+            workspace_name: Workspace name for the Fluentd log tag
+        Returns:
+            The compose file path and the external service ports
+        """
+        compose_file_path = DockerComposeRemoteVMUtils.get_compose_file_path(project_path=project_path)
+        compose_content = DockerComposeRemoteVMUtils.read_compose_file(compose_file_path)
+        services_ports = DockerComposeRemoteVMUtils._retrieve_external_service_ports(compose_content=compose_content)
+        DockerComposeRemoteVMUtils.enable_fluentd_logging(compose_content, username, workspace_name)
+        DockerComposeRemoteVMUtils.write_compose_file(compose_file_path, compose_content)
+        return compose_file_path, services_ports
+
     @staticmethod
     async def run_docker_compose_deploy(project_path, username, workspace_name, env_file_path=None)-> DockerOperationResult:
 
         try:
-            logger.debug("Performing optional pre-deployment cleanup...")
-            await DockerComposeRemoteVMUtils.run_docker_compose_cleanup(project_path, username=username, workspace_name=workspace_name)
+            # Resolved once and shared with the cleanup stage
+            context_result = await DockerContextManager.set_context_for_user_workspace(username, workspace_name)
         except DockerContextSetException as e:
             raise DockerComposeDeployFailedException("Failed in cleanup stage for container deployment") from e
         try:
-            context_result = await DockerContextManager.set_context_for_user_workspace(username, workspace_name)
             container_name = generate_unique_name(project_base_path=project_path, username=username)
-            env_file_arg = f"--env-file {env_file_path}" if env_file_path else ""
-            services_ports = DockerComposeRemoteVMUtils._retrieve_external_service_ports(project_path=project_path)
-            # Enable Fluentd logging in the compose file before deployment
-            compose_file_path = DockerComposeRemoteVMUtils.get_compose_file_path(project_path=project_path)
-            DockerComposeRemoteVMUtils.enable_fluentd_logging(compose_file_path, username, workspace_name)
+            env_file_arg = ["--env-file", env_file_path] if env_file_path else None
+            logger.debug("Performing optional pre-deployment cleanup...")
+            # The cleanup only talks to the VM and the compose file preparation (file walking,
+            # YAML work and the port identification call, all blocking) only touches local
+            # files, so run them side by side. Cleanup keeps the images and build cache
+            # produced by the preceding build step.
+            _, (compose_file_path, services_ports) = await asyncio.gather(
+                DockerComposeRemoteVMUtils.run_docker_compose_cleanup(
+                    project_path, username=username, workspace_name=workspace_name, context=context_result,
+                    keep_build_artifacts=True
+                ),
+                asyncio.to_thread(
+                    DockerComposeRemoteVMUtils._prepare_compose_file, project_path, username, workspace_name
+                )
+            )
             # Deploy
             deploy_command = DockerComposeRemoteVMUtils.generate_deploy_command(
                 compose_file=compose_file_path,
@@ -145,8 +185,8 @@ class DockerComposeRemoteVMUtils:
                 env_file_arg=env_file_arg,
                 context_name=context_result.context_name
             )
-            logger.debug("Run command: " + deploy_command)
-            run_result = DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging(deploy_command, container_name=container_name)
+            logger.debug("Run command: " + shlex.join(deploy_command))
+            run_result = await DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging_async(deploy_command, container_name=container_name)
             if run_result.success is False:
                 return DockerOperationResult(
                     success=False,
@@ -155,10 +195,13 @@ class DockerComposeRemoteVMUtils:
                     operation=DockerOperationType.UP
                 )
             docker_compose_logger = DockerComposeLogHandler(project_path)
-            docker_compose_logger.follow_compose_logs(compose_file=compose_file_path, project_name=container_name)
+            # Only sets up the watcher (no log streaming), but building its WorkspaceMonitor
+            # is not free; keep it off the event loop
+            await asyncio.to_thread(
+                docker_compose_logger.follow_compose_logs, compose_file=compose_file_path, project_name=container_name
+            )
             traefik_gen = TraefikTomlGenerator()
-            service_name = generate_unique_name(project_base_path=project_path, username=username)
-            toml, final_urls = traefik_gen.generate_toml(service_name=service_name, private_ip=context_result.ip, service_ports=services_ports)
+            toml, final_urls = traefik_gen.generate_toml(service_name=container_name, private_ip=context_result.ip, service_ports=services_ports)
             return DockerOperationResult(
                 success=True,
                 message="Your project has been deployed successfully.",
@@ -167,98 +210,66 @@ class DockerComposeRemoteVMUtils:
                 metadata={"container_name": container_name,"urls": final_urls}
             )
         except Exception as e:
-            logger.error(f"Error in deploying to remote VM {traceback.format_exc()}")
-            raise DockerComposeDeployFailedException(message=f"Error in deploying to remote VM: {traceback.format_exc()}", original_exception=e)
+            error_trace = traceback.format_exc()
+            logger.error(f"Error in deploying to remote VM {error_trace}")
+            raise DockerComposeDeployFailedException(message=f"Error in deploying to remote VM: {error_trace}", original_exception=e)
 
     @staticmethod
-    def generate_deploy_command(compose_file, project_name, env_file_arg=None, context_name=None) -> str:
+    def generate_deploy_command(compose_file, project_name, env_file_arg: Union[str, List[str], None] = None, context_name=None) -> List[str]:
         """
         Generate the Docker Compose command for deployment.
         
         Returns:
-            The full Docker Compose command as a string
+            The full Docker Compose command as an argv list
         """
-        command_parts = ["docker"]
-        if context_name:
-            command_parts.extend(["--context", context_name])
-        command_parts.append("compose")
-        
-        # Add compose file
-        command_parts.extend(["-f", compose_file])
-        
-        # Add project name
-        command_parts.extend(["-p", project_name])
-        
-        # Add env file if specified
-        if env_file_arg:
-            command_parts.extend([env_file_arg])
-        
-        # Add up command
-        command_parts.append("up")
-        # Add detached mode
-        command_parts.append("-d")
-        # Add --wait flag to ensure it waits for the containers to be ready
-        command_parts.append("--wait")
-        
-        # Join all parts with spaces
-        return " ".join(command_parts)
+        # Detached, and --wait until the containers are ready
+        return [*DockerComposeRemoteVMUtils._compose_argv(compose_file, project_name, env_file_arg, context_name), "up", "-d", "--wait"]
     
     @staticmethod
-    def generate_build_command(compose_file, project_name, env_file_arg=None, context_name=None) -> str:
+    def generate_build_command(compose_file, project_name, env_file_arg: Union[str, List[str], None] = None, context_name=None) -> List[str]:
         """
         Generate the Docker Compose build command.
         
         Returns:
-            The full Docker Compose build command as a string
+            The full Docker Compose build command as an argv list
         """
-        command_parts = ["DOCKER_BUILDKIT=0 docker"]
+        # Commands are run without a shell, so no VAR=value prefix; BuildKit (the
+        # default builder) reuses the layer cache that pre-deploy cleanup now keeps
+        return [*DockerComposeRemoteVMUtils._compose_argv(compose_file, project_name, env_file_arg, context_name), "build"]
+
+    @staticmethod
+    def _compose_argv(compose_file, project_name, env_file_arg: Union[str, List[str], None], context_name) -> List[str]:
+        """Common `docker [--context X] compose -f F -p P [env args]` prefix as argv"""
+        argv = ["docker"]
         if context_name:
-            command_parts.extend(["--context", context_name])
-        command_parts.append("compose")
-        
-        # Add compose file
-        command_parts.extend(["-f", compose_file])
-        
-        # Add project name
-        command_parts.extend(["-p", project_name])
-        
-        # Add env file if specified
+            argv += ["--context", context_name]
+        argv += ["compose", "-f", compose_file, "-p", project_name]
         if env_file_arg:
-            if isinstance(env_file_arg, (tuple, list)):
-                command_parts.extend(env_file_arg)
-            else:
-                command_parts.append(env_file_arg)
-        
-        # Add build command
-        command_parts.append("build")
-        
-        # Join all parts with spaces
-        return " ".join(command_parts)
+            argv += shlex.split(env_file_arg) if isinstance(env_file_arg, str) else list(env_file_arg)
+        return argv
 
     @staticmethod
-    def enable_fluentd_logging(compose_file_path: str, username: str, workspace: str) -> str:
+    def enable_fluentd_logging(compose_content: Dict[str, Any], username: str, workspace: str) -> Dict[str, Any]:
         """
-        Add Fluentd logging configuration to the docker-compose file.
+        Add Fluentd logging configuration to parsed docker-compose content.
         
         Args:
-            compose_file_path: Path to the docker-compose.yml file
+            compose_content: Parsed docker-compose content, updated in place
             username: Username for the log tag
             workspace: Workspace name for the log tag
             
         Returns:
-            Path to the modified compose file with Fluentd logging enabled
+            The compose content with Fluentd logging enabled
         """
-        from app.docker.fluentd_enabler import FluentdEnabler
-        
-        fluentd_enabler = FluentdEnabler()
-        updated = fluentd_enabler.add_fluentd_to_compose(
-            compose_file_path=compose_file_path,
+        updated = fluentd_enabler.add_fluentd_to_compose_data(
+            compose_data=compose_content,
             username=username,
             workspace=workspace
         )
         if not updated:
-            logger.error(f"Failed to enable Fluentd logging in {compose_file_path}")
+            logger.error("Failed to enable Fluentd logging: no services in compose file")
             raise RuntimeError("Failed to enable Fluentd logging")
+        return compose_content
         
     @staticmethod
     def get_mapped_project_path(project_path: str) -> str:
@@ -271,50 +282,84 @@ class DockerComposeRemoteVMUtils:
         Returns:
             Mapped project path for use in Docker volumes
         """
-        volume_map = dict([os.environ.get('BASE_VOLUME_DIR_MAP', '').split(':', 1)])
-            
-        for base_path, volume_path in volume_map.items():
-            if project_path.startswith(base_path):
-                return project_path.replace(base_path, volume_path, 1)
-        return project_path
+        return map_project_path_to_volume(project_path)
 
     @staticmethod
-    async def run_docker_compose_cleanup(project_path, username=None, workspace_name=None) -> CommandResult:
+    async def run_docker_compose_cleanup(project_path, username=None, workspace_name=None, context: Optional[DockerContextResult] = None,
+                                         keep_build_artifacts: bool = False) -> CommandResult:
         """
         Perform selective cleanup for a specific project without disturbing other running containers.
         Only cleans up resources related to this project.
         
         Args:
             project_path: Path to the project directory
-            user_id: User identifier
+            username: Username of the workspace owner
+            workspace_name: Workspace name
+            context: Docker context already set by the caller; resolved here if omitted
+            keep_build_artifacts: Keep the project images and the build cache (used
+                before a deploy so the images just built are not thrown away)
             
         Returns:
             CommandResult indicating success/failure of cleanup operations
         """ 
         try:
-            os.chdir(project_path)
             container_name = generate_unique_name(project_base_path=project_path, username=username)
-            context = await DockerContextManager.set_context_for_user_workspace(username, workspace_name)
+            if context is None:
+                context = await DockerContextManager.set_context_for_user_workspace(username, workspace_name)
+            cmd_handler = DockerCommandWithLogHandler(project_path)
+            # Probe for anything labelled with this project (containers, volumes and,
+            # unless kept, images) so a project that was never deployed skips the sequence
+            project_filter = f"--filter label=com.docker.compose.project={container_name}"
+            probe_commands = [
+                f'docker --context {context.context_name} ps -a -q {project_filter}',
+                f'docker --context {context.context_name} volume ls -q {project_filter}'
+            ]
+            if not keep_build_artifacts:
+                probe_commands.append(f'docker --context {context.context_name} images -q {project_filter}')
+            probe = await cmd_handler.run_docker_commands_with_logging_async(
+                f"sh -c {shlex.quote(' && '.join(probe_commands))}", container_name=container_name
+            )
+            if probe.success and not (probe.output or "").strip():
+                logger.info(f"Nothing deployed for Docker Compose project {container_name}, skipping cleanup")
+                return CommandResult(success=True, output=f"Nothing to clean up for {container_name}")
             cleanup_commands = [
                 f'docker --context {context.context_name} compose -p {container_name} down --volumes --remove-orphans',
-                f'docker --context {context.context_name} images -q --filter "label=com.docker.compose.project={container_name}" | xargs docker --context {context.context_name} rmi -f 2>/dev/null || true',
                 f'docker --context {context.context_name} image prune -f',
-                f'docker --context {context.context_name} builder prune -f',
                 f'docker --context {context.context_name} volume prune -f'
             ]
-            results = []
-            for cmd in cleanup_commands:
-                logger.info(f"Running selective cleanup command: {cmd}")
-                try:
-                    result = DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging(cmd, container_name=container_name)
-                    if result:
-                        results.append(result)
-                        if not result.success:
-                            logger.warning(f"Cleanup command failed (non-critical): {cmd} - {result.error}")
-                    else:
-                        logger.warning(f"Cleanup command returned None: {cmd}")
-                except Exception as cmd_error:
-                    logger.warning(f"Error running cleanup command '{cmd}': {str(cmd_error)}")
+            if not keep_build_artifacts:
+                cleanup_commands.append(f'docker --context {context.context_name} builder prune -f')
+            # One shell runs the whole sequence instead of one subprocess (and log
+            # file rewrite) per command; ';' keeps going past non-critical failures
+            cmd = f"sh -c {shlex.quote(' ; '.join(cleanup_commands))}"
+            logger.info(f"Running selective cleanup commands: {cmd}")
+            try:
+                result = await cmd_handler.run_docker_commands_with_logging_async(cmd, container_name=container_name)
+                if not result.success:
+                    logger.warning(f"Cleanup commands failed (non-critical): {result.error}")
+            except Exception as cmd_error:
+                logger.warning(f"Error running cleanup commands: {str(cmd_error)}")
+                result = CommandResult(success=False, error=f"Error running cleanup commands: {str(cmd_error)}")
+            outputs = [result.output] if result.output else []
+            errors = [result.error] if result.error and not result.success else []
+            # Remove only images specific to this project (if they exist)
+            image_success = True
+            if not keep_build_artifacts:
+                image_result = await asyncio.to_thread(
+                    DockerUtils.remove_project_images, project_path, container_name,
+                    docker_command=f"docker --context {context.context_name}"
+                )
+                image_success = image_result.success
+                if image_result.output:
+                    outputs.append(image_result.output)
+                if not image_result.success:
+                    logger.warning(f"Removing project images failed (non-critical): {image_result.error}")
+                    errors.append(f"Removing project images failed: {image_result.error}")
+            return CommandResult(
+                success=result.success and image_success,
+                output="\n".join(outputs) or f"Cleaned up {container_name}",
+                error="\n".join(errors) or None
+            )
         except DockerContextSetException as e:
             raise DockerComposeCleanupFailedException(original_exception=e)
 
@@ -357,13 +402,14 @@ class DockerComposeRemoteVMUtils:
             results = []
             successful_commands = 0
             
-            for cmd in vm_cleanup_commands:
-                logger.info(f"Running VM cleanup command: {cmd}")
-                try:
-                    # Create a simple project path for logging (this is just for the log handler)
-                    import tempfile
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        result = DockerCommandWithLogHandler(temp_dir).run_docker_commands_with_logging(cmd, container_name="vm-cleanup")
+            # Create a simple project path for logging (this is just for the log handler),
+            # shared by every command
+            with tempfile.TemporaryDirectory() as temp_dir:
+                cmd_handler = DockerCommandWithLogHandler(temp_dir)
+                for cmd in vm_cleanup_commands:
+                    logger.info(f"Running VM cleanup command: {cmd}")
+                    try:
+                        result = await cmd_handler.run_docker_commands_with_logging_async(cmd, container_name="vm-cleanup")
                         if result:
                             results.append(result)
                             if result.success:
@@ -373,9 +419,9 @@ class DockerComposeRemoteVMUtils:
                                 logger.warning(f"VM cleanup command failed (non-critical): {cmd} - {result.error}")
                         else:
                             logger.warning(f"VM cleanup command returned None: {cmd}")
-                except Exception as cmd_error:
-                    logger.warning(f"Error running VM cleanup command '{cmd}': {str(cmd_error)}")
-                    # Continue with other cleanup commands even if one fails
+                    except Exception as cmd_error:
+                        logger.warning(f"Error running VM cleanup command '{cmd}': {str(cmd_error)}")
+                        # Continue with other cleanup commands even if one fails
             
             total_commands = len(vm_cleanup_commands)
             logger.info(f"VM cleanup completed: {successful_commands}/{total_commands} commands succeeded")
@@ -1,31 +1,41 @@
+import copy
+import functools
 import os
-from .helper_functions import generate_unique_name, extract_username_and_workspace_from_path
+import re
+from pathlib import Path
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from .helper_functions import generate_unique_name, extract_username_and_workspace_from_path, map_project_path_to_volume, YAML_LOADER
 from app.custom_logging import logger
 from .utils import DockerUtils
 from .docker_log_handler import DockerCommandWithLogHandler, CommandResult, DockerComposeLogHandler
-import traceback
 import yaml
-from typing import Dict, Any, Optional
-from .traefik_labeler import TraefikLabeler
-import json
+from typing import Callable, Dict, Any, List, Optional, Union
+from .traefik_labeler import traefik_labeler
+from .fluentd_enabler import fluentd_enabler
+import orjson
+
+
+# Volume sources that are already absolute or home-relative, and the leading
+# ./ stripped from relative ones before they are joined onto the mapped project path
+_ABS_OR_HOME = re.compile(r'[/~]')
+_REL_PREFIX = re.compile(r'^\./')
 
 class DockerComposeUtils():
 
     @staticmethod
     def run_docker_compose_down(project_path, user_id)->CommandResult:
-        os.chdir(project_path)
         container_name = generate_unique_name(project_base_path=project_path, username=user_id)
         try:
-            cmd =  f'docker compose -p {container_name} down'
+            cmd = ["docker", "compose", "-p", container_name, "down"]
             return DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging(cmd, container_name=container_name)
         except Exception as e:
-            error_msg = f"Error stopping container: {traceback.format_exc()}"
-            logger.error(error_msg)
-            return CommandResult(success=False, error=error_msg)
+            logger.exception("Error stopping container")
+            return CommandResult(success=False, error=f"Error stopping container: {str(e)}")
 
     @staticmethod
     def run_docker_compose_build(project_path, user_id)->CommandResult:
-        os.chdir(project_path)
         container_name = generate_unique_name(project_base_path=project_path, username=user_id)
         try:
             compose_file, _ = DockerComposeUtils.generate_docker_compose_file(project_path=project_path, container_name=container_name)
@@ -36,63 +46,56 @@ class DockerComposeUtils():
             cmd_handler = DockerCommandWithLogHandler(project_path)
             return cmd_handler.run_docker_commands_with_logging(cmd, container_name=container_name)
         except Exception as e:
-            error_msg = f"Error building container: {traceback.format_exc()}"
-            logger.error(error_msg)
-            return CommandResult(success=False, error=error_msg)
+            logger.exception("Error building container")
+            return CommandResult(success=False, error=f"Error building container: {str(e)}")
 
     @staticmethod
     def _get_host_port_docker_compose(project_path):
         """Get the deployment port from the docker-compose file"""
         try:
-            compose_file = os.path.join(project_path, 'docker-compose.yml')
-            if not os.path.exists(compose_file):
-                return None
-                
-            with open(compose_file, 'r') as f:
-                compose_config = yaml.safe_load(f)
-                
-            # Look for port mapping in the first service
-            services = compose_config.get('services', {})
-            if not services:
+            # Top level only, preferring docker-compose.json; the stat in
+            # read_compose_ports doubles as the existence check
+            for compose_file_name in ('docker-compose.json', 'docker-compose.yml'):
+                try:
+                    services_ports = DockerUtils.read_compose_ports(os.path.join(project_path, compose_file_name))
+                    break
+                except FileNotFoundError:
+                    continue
+            else:
                 return None
-                
-            all_ports = {}
-            
-            # Iterate through all services
-            for service_name, service_config in services.items():
-                ports = service_config.get('ports', [])
-                
-                # Extract all host ports
-                for port in ports:
-                    if isinstance(port, str):
-                        all_ports[service_name] = port.split(':')[0]
-                    elif isinstance(port, dict):
-                        published_port = port.get('published')
-                        if published_port:
-                            all_ports[service_name] = published_port
-            
+
+            # Ports are normalized when the file is parsed; the last published port wins
+            all_ports = {service_name: ports[-1]['published'] for service_name, ports in services_ports.items()}
             return all_ports if all_ports else None
         except Exception as e:
-            logger.error(f"Error reading docker-compose.yml: {traceback.format_exc()}")
+            logger.exception("Error reading docker-compose.yml")
             return None
 
-    def _dev_env_deploy(project_path, container_name, host_ports, env_file_arg):
+    def _dev_env_deploy(project_path, container_name, host_ports, env_file_arg,
+                        before_up: Optional[Callable[[], None]] = None):
 
-        cmd = f'docker compose {env_file_arg} -p {container_name} up -d --build'
-        logger.info("Run command: " + cmd)
         service_urls = {}
         for service_name, host_port in host_ports.items():
             service_urls[service_name] = f"http://localhost:{host_port}"     
         try :
-            compose_file_name = DockerUtils.get_service_paths(project_path=project_path, only_compose=True)[0]
-            compose_file_path = os.path.join(project_path, compose_file_name)
-            DockerComposeUtils.update_volume_paths(compose_file_path=compose_file_path, project_path=project_path)
+            compose_file_path = DockerUtils.get_compose_file_path(project_path)
+            # Explicit -f: the compose file may not be in the working directory
+            cmd = DockerComposeUtils.generate_deploy_command(
+                compose_file=compose_file_path,
+                project_name=container_name,
+                env_file_arg=env_file_arg,
+                build=True
+            )
+            logger.info("Run command: " + shlex.join(cmd))
             username, workspace = extract_username_and_workspace_from_path(project_path=project_path)
-            DockerComposeUtils.enable_fluentd_logging(
+            DockerComposeUtils._prepare_dev_compose_file(
                 compose_file_path=compose_file_path,
+                project_path=project_path,
                 username=username,
                 workspace=workspace
             )
+            if before_up:
+                before_up()
             # Run the docker compose command
             run_result = DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging(cmd, container_name=container_name)
             
@@ -104,12 +107,13 @@ class DockerComposeUtils():
                     project_name=container_name
                 )
                 
-                run_result.set_deploy_info(json.dumps({"urls": service_urls, "container_name": container_name}))
+                run_result.set_deploy_info(orjson.dumps({"urls": service_urls, "container_name": container_name}).decode())
                 return run_result
             return run_result
         except Exception as e:
-            logger.error(f"Error in deploying in dev env {traceback.format_exc()}")
-            return CommandResult(success=False, error=str(e), deploy_info=json.dumps({"urls": [], "error": {traceback.format_exc()}}))
+            # The traceback goes to the log only; callers get the short error
+            logger.exception("Error in deploying in dev env")
+            return CommandResult(success=False, error=str(e), deploy_info=orjson.dumps({"urls": [], "error": str(e)}).decode())
     
     def generate_network_compose_file(compose_file: str) -> str:
         # Generate output filename
@@ -119,22 +123,37 @@ class DockerComposeUtils():
     
     def generate_docker_compose_file(project_path: str, container_name) -> str:
         try:
-            compose_file_name = DockerUtils.get_service_paths(project_path=project_path, only_compose=True)[0]
-            compose_file_path = os.path.join(project_path, compose_file_name)
+            compose_file_path = DockerUtils.get_compose_file_path(project_path)
             network_compose_file = DockerComposeUtils.generate_network_compose_file(compose_file=compose_file_path)
-            traefik_labeler = TraefikLabeler()
-            service_urls = traefik_labeler.add_traefik_labels(compose_file=compose_file_path, project_name=container_name, output_file=network_compose_file)
-              # Update volume paths in the compose file
-            DockerComposeUtils.update_volume_paths(compose_file_path=network_compose_file, project_path=project_path)
+            # Label the cached parse and fix up volume paths in memory, then write the
+            # network compose file once instead of writing it and re-reading it
+            network_compose_data, service_urls = traefik_labeler.label_compose_data(
+                DockerUtils.read_compose_file(compose_file_path), project_name=container_name
+            )
+            try:
+                DockerComposeUtils._rewrite_volume_paths(network_compose_data, project_path)
+            except Exception:
+                # Non-fatal, as with update_volume_paths
+                logger.exception("Error updating volume paths")
+            DockerUtils.write_compose_file(network_compose_file, network_compose_data, sort_keys=False)
             return network_compose_file, service_urls
         except Exception as e:
-            logger.error(f"Error generating docker-compose file: {traceback.format_exc()}")
+            logger.exception("Error generating docker-compose file")
             raise e
-    def _prod_env_deploy(container_name, env_file_arg, project_path):
+    def _prod_env_deploy(container_name, env_file_arg, project_path,
+                         before_up: Optional[Callable[[], None]] = None):
         try:
             network_compose_file, service_urls = DockerComposeUtils.generate_docker_compose_file(project_path=project_path, container_name=container_name)
-            generate_deploy_command = DockerComposeUtils.generate_deploy_command(compose_file=network_compose_file, project_name=container_name, env_file_arg=env_file_arg)
-            logger.info("Run command: " + generate_deploy_command)
+            generate_deploy_command = DockerComposeUtils.generate_deploy_command(
+                compose_file=network_compose_file,
+                project_name=container_name,
+                env_file_arg=env_file_arg,
+                # This path has no separate build step
+                build=True
+            )
+            logger.info("Run command: " + shlex.join(generate_deploy_command))
+            if before_up:
+                before_up()
             
             # Run the docker compose command      
             run_result = DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging(generate_deploy_command, container_name=container_name)
@@ -147,67 +166,88 @@ class DockerComposeUtils():
                     project_name=container_name
                 )
                 
-                run_result.set_deploy_info(json.dumps({"urls": service_urls, "container_name": container_name}))
+                run_result.set_deploy_info(orjson.dumps({"urls": service_urls, "container_name": container_name}).decode())
                 return run_result
             return run_result
         except Exception as e:
-            logger.error(f"Error in deploying in prod env {traceback.format_exc()}")
-            return CommandResult(success=False, error=str(e), deploy_info=json.dumps({"urls": [], "error": traceback.format_exc()}))
+            # The traceback goes to the log only; callers get the short error
+            logger.exception("Error in deploying in prod env")
+            return CommandResult(success=False, error=str(e), deploy_info=orjson.dumps({"urls": [], "error": str(e)}).decode())
         
     @staticmethod
     def run_docker_compose_deploy(project_path, user_id, env_file_path=None):
+        """
+        Clean up and deploy a project with docker compose up.
+
+        Args:
+            project_path: Path to the project directory
+            user_id: User identifier
+            env_file_path: Optional env file passed to docker compose
+
+        Returns:
+            CommandResult of the deployment
+        """
         container_name = generate_unique_name(project_base_path=project_path, username=user_id)
-        env_file_arg = ""
+        env_file_arg = None
         if env_file_path is not None:
-            env_file_arg = f"--env-file {env_file_path}"
+            env_file_arg = ["--env-file", env_file_path]
         host_ports = DockerComposeUtils._get_host_port_docker_compose(project_path=project_path)
         
         # Default to a placeholder port if none is found
         if host_ports is None:
              raise ValueError("No host ports found in the docker-compose file.")
 
-        # Perform optional pre-deployment cleanup to free up space
-        # These operations are non-critical and should never fail the deployment
-        try:
-            logger.info("Performing optional pre-deployment cleanup...")
-            cleanup_result = DockerComposeUtils.run_docker_compose_cleanup(project_path, user_id)
-            if cleanup_result.success:
-                logger.info("Pre-deployment cleanup completed successfully")
-            else:
-                logger.info(f"Pre-deployment cleanup completed with warnings: {cleanup_result.error}")
-        except Exception as cleanup_error:
-            logger.info(f"Pre-deployment cleanup skipped due to error: {str(cleanup_error)}")
+        # Perform optional pre-deployment and system cleanup to free up space. These
+        # operations are non-critical and should never fail the deployment. They run in
+        # the background while the deploy prepares its compose file; the deploy waits for
+        # them right before `up`, which must not race the project's `down` or the build
+        # cache prune
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            logger.info("Performing optional pre-deployment and system cleanup...")
+            cleanup_futures = {
+                "Pre-deployment cleanup": executor.submit(
+                    DockerComposeUtils.run_docker_compose_cleanup, project_path, user_id,
+                    container_name=container_name
+                ),
+                "System cleanup": executor.submit(DockerComposeUtils.run_system_cleanup),
+            }
+            wait_for_cleanup = functools.partial(DockerComposeUtils._wait_for_cleanup, cleanup_futures)
 
-        # Perform optional system cleanup to free more space
-        # This is also non-critical and should never fail the deployment
-        try:
-            logger.info("Performing optional system cleanup...")
-            system_cleanup_result = DockerComposeUtils.run_system_cleanup()
-            if system_cleanup_result.success:
-                logger.info("System cleanup completed successfully")
+            # Proceed with the actual deployment
+            if os.getenv('FLASK_ENV') == 'development':
+                return DockerComposeUtils._dev_env_deploy(project_path=project_path, container_name=container_name, 
+                                                          host_ports=host_ports, env_file_arg=env_file_arg,
+                                                          before_up=wait_for_cleanup)
             else:
-                logger.info(f"System cleanup completed with warnings: {system_cleanup_result.error}")
-        except Exception as system_cleanup_error:
-            logger.info(f"System cleanup skipped due to error: {str(system_cleanup_error)}")
+                return DockerComposeUtils._prod_env_deploy(container_name=container_name, 
+                                                            env_file_arg=env_file_arg, 
+                                                           project_path=project_path,
+                                                           before_up=wait_for_cleanup)
 
-        # Proceed with the actual deployment
-        if os.getenv('FLASK_ENV') == 'development':
-            return DockerComposeUtils._dev_env_deploy(project_path=project_path, container_name=container_name, 
-                                                      host_ports=host_ports, env_file_arg=env_file_arg)
-        else:
-            return DockerComposeUtils._prod_env_deploy(container_name=container_name, 
-                                                        env_file_arg=env_file_arg, 
-                                                       project_path=project_path)
-    
-                
+    @staticmethod
+    def _wait_for_cleanup(cleanup_futures) -> None:
+        """Wait for the background cleanup operations and log how each went; never raises"""
+        for label, future in cleanup_futures.items():
+            try:
+                result = future.result()
+                if result.success:
+                    logger.info(f"{label} completed successfully")
+                else:
+                    logger.info(f"{label} completed with warnings: {result.error}")
+            except Exception as cleanup_error:
+                logger.info(f"{label} skipped due to error: {str(cleanup_error)}")
 
     @staticmethod
-    def generate_deploy_command(compose_file, project_name, env_file_arg=None)-> str:
+    def generate_deploy_command(compose_file, project_name, env_file_arg: Union[str, List[str], None] = None, build: bool = False)-> List[str]:
         """
         Generate the Docker Compose command for deployment.
+
+        Args:
+            build: Add --build so images are rebuilt on up. Only needed when the
+                images were not built by a separate build step.
         
         Returns:
-            The full Docker Compose command as a string
+            The full Docker Compose command as an argv list
         """
         command_parts = ["docker", "compose"]
         
@@ -219,24 +259,23 @@ class DockerComposeUtils():
         
         # Add env file if specified
         if env_file_arg:
-            command_parts.extend([env_file_arg])
+            command_parts.extend(shlex.split(env_file_arg) if isinstance(env_file_arg, str) else env_file_arg)
         
         # Add up command
         command_parts.append("up")
         # Add detached mode
         command_parts.append("-d")
-          # Add build flag. Since we are building it earlier. we can skip this.
-        command_parts.append("--build")    
+        if build:
+            command_parts.append("--build")
         
-        # Join all parts with spaces
-        return " ".join(command_parts)
+        return command_parts
     
-    def generate_build_command(compose_file, project_name, env_file_arg=None) -> str:
+    def generate_build_command(compose_file, project_name, env_file_arg: Union[str, List[str], None] = None) -> List[str]:
         """
         Generate the Docker Compose build command.
         
         Returns:
-            The full Docker Compose build command as a string
+            The full Docker Compose build command as an argv list
         """
         command_parts = ["docker", "compose"]
         
@@ -248,13 +287,12 @@ class DockerComposeUtils():
         
         # Add env file if specified
         if env_file_arg:
-            command_parts.extend([env_file_arg])
+            command_parts.extend(shlex.split(env_file_arg) if isinstance(env_file_arg, str) else env_file_arg)
         
         # Add build command
         command_parts.append("build")
         
-        # Join all parts with spaces
-        return " ".join(command_parts)
+        return command_parts
 
     @staticmethod
     def get_service_urls(compose_file, container_name, domain_base: str="apps.synergiqai.com") -> Dict[str, str]:
@@ -267,21 +305,97 @@ class DockerComposeUtils():
         Returns:
             Dictionary mapping service names to their URLs
         """
-        import yaml
+        # Only the service names are needed: compose the node tree and read the
+        # keys of the services mapping without constructing each service's body
+        root = yaml.compose(Path(compose_file).read_bytes(), Loader=YAML_LOADER)
         
-        # Read the compose file
-        with open(compose_file, 'r') as f:
-            compose_data = yaml.safe_load(f)
+        if isinstance(root, yaml.MappingNode):
+            for key_node, value_node in root.value:
+                if key_node.value == 'services' and isinstance(value_node, yaml.MappingNode):
+                    return {
+                        service_key.value: f"https://{service_key.value}-{container_name}.{domain_base}"
+                        for service_key, _ in value_node.value
+                    }
+        return {}
+    
+    @staticmethod
+    def _rewrite_volume(volume, mapped_path: str, join=os.path.join):
+        """
+        Prepend the mapped project path to a relative volume source.
+
+        Args:
+            volume: Volume entry, either "source:target" or {source: ..., target: ...}
+            mapped_path: Mapped project path
+            join: Bound os.path.join, avoids a global lookup per volume
+
+        Returns:
+            The rewritten volume, or the same object if it needs no change
+        """
+        # Handle string format "source:target"
+        if isinstance(volume, str):
+            if ':' in volume:
+                source, target = volume.split(':', 1)
+                # Handle relative paths (including those starting with ./)
+                if not _ABS_OR_HOME.match(source):
+                    # It's a relative path, prepend with mapped project path
+                    return f"{join(mapped_path, _REL_PREFIX.sub('', source))}:{target}"
+            return volume
+        # Handle object format {source: ..., target: ...}
+        if isinstance(volume, dict) and 'source' in volume and not _ABS_OR_HOME.match(volume['source']):
+            return {**volume, 'source': join(mapped_path, _REL_PREFIX.sub('', volume['source']))}
+        return volume
+
+    @staticmethod
+    def _rewrite_volume_paths(compose_data: Dict[str, Any], project_path: str) -> bool:
+        """
+        Prepend the mapped project path to relative volume sources, in place.
+
+        Args:
+            compose_data: Parsed docker-compose content
+            project_path: Base project path to be mapped
+
+        Returns:
+            True if any volume was rewritten
+        """
+        mapped_path = DockerComposeUtils.get_mapped_project_path(project_path)
+        changed = False
         
-        urls = {}
+        # Process each service's volumes
+        rewrite_volume = DockerComposeUtils._rewrite_volume
         services = compose_data.get('services', {})
-        
-        for service_name in services:
-            url = f"https://{service_name}-{container_name}.{domain_base}"
-            urls[service_name] = url
-        
-        return urls
-    
+        for service_config in services.values():
+            volumes = service_config.get('volumes')
+            if volumes:
+                updated_volumes = [rewrite_volume(volume, mapped_path) for volume in volumes]
+                # _rewrite_volume returns the same object for volumes it leaves alone
+                if any(updated is not volume for updated, volume in zip(updated_volumes, volumes)):
+                    service_config['volumes'] = updated_volumes
+                    changed = True
+        return changed
+
+    @staticmethod
+    def _prepare_dev_compose_file(compose_file_path: str, project_path: str, username: str, workspace: str) -> None:
+        """
+        Rewrite relative volume paths and enable Fluentd logging in a single
+        read-parse-write pass over the compose file.
+
+        Args:
+            compose_file_path: Path to the docker-compose.yml file
+            project_path: Base project path to be mapped
+            username: Username for the log tag
+            workspace: Workspace name for the log tag
+        """
+        compose_data = copy.deepcopy(DockerUtils.read_compose_file(compose_file_path))
+        try:
+            DockerComposeUtils._rewrite_volume_paths(compose_data, project_path)
+        except Exception:
+            # Non-fatal, as with update_volume_paths
+            logger.exception("Error updating volume paths")
+        if not fluentd_enabler.add_fluentd_to_compose_data(compose_data, username, workspace):
+            logger.error(f"Failed to enable Fluentd logging in {compose_file_path}")
+            raise RuntimeError("Failed to enable Fluentd logging")
+        DockerUtils.write_compose_file(compose_file_path, compose_data, indent=2)
+
     @staticmethod
     def update_volume_paths(compose_file_path: str, project_path: str) -> None:
         """
@@ -297,50 +411,20 @@ class DockerComposeUtils():
         """
         try:
             # Read the compose file
-            with open(compose_file_path, 'r') as f:
-                compose_data = yaml.safe_load(f)
+            # Copied: the volumes are rewritten below
+            compose_data = copy.deepcopy(DockerUtils.read_compose_file(compose_file_path))
             
-            mapped_path = DockerComposeUtils.get_mapped_project_path(project_path)
+            if not DockerComposeUtils._rewrite_volume_paths(compose_data, project_path):
+                logger.debug(f"Volume paths in {compose_file_path} already absolute, not rewriting")
+                return True
             
-            # Process each service's volumes
-            services = compose_data.get('services', {})
-            for service_name, service_config in services.items():
-                if 'volumes' in service_config:
-                    updated_volumes = []
-                    for volume in service_config['volumes']:
-                        # Handle string format "source:target"
-                        if isinstance(volume, str) and ':' in volume:
-                            source, target = volume.split(':', 1)
-                            # Handle relative paths (including those starting with ./)
-                            if not source.startswith('/') and not source.startswith('~'):
-                                # Remove leading ./ if present
-                                if source.startswith('./'):
-                                    source = source[2:]
-                                # It's a relative path, prepend with mapped project path
-                                source = os.path.join(mapped_path, source)
-                            updated_volumes.append(f"{source}:{target}")
-                        # Handle object format {source: ..., target: ...}
-                        elif isinstance(volume, dict) and 'source' in volume:
-                            if not volume['source'].startswith('/') and not volume['source'].startswith('~'):
-                                # Remove leading ./ if present and also handle ~
-                                if volume['source'].startswith('./') or volume['source'].startswith('~/'):
-                                    volume['source'] = volume['source'][2:]
-                                volume['source'] = os.path.join(mapped_path, volume['source'])
-                            updated_volumes.append(volume)
-                        else:
-                            updated_volumes.append(volume)
-                    
-                    service_config['volumes'] = updated_volumes
-            
-            # Write the updated compose file
-            with open(compose_file_path, 'w') as f:
-                yaml.dump(compose_data, f, default_flow_style=False)
+            DockerUtils.write_compose_file(compose_file_path, compose_data)
                 
             logger.info(f"Updated volume paths in {compose_file_path}")
             return True
                 
         except Exception as e:
-            logger.error(f"Error updating volume paths: {traceback.format_exc()}")
+            logger.exception("Error updating volume paths")
             return False
 
     def enable_fluentd_logging(compose_file_path: str, username: str, workspace: str) -> str:
@@ -355,9 +439,6 @@ class DockerComposeUtils():
         Returns:
             Path to the modified compose file with Fluentd logging enabled
         """
-        from app.docker.fluentd_enabler import FluentdEnabler
-        
-        fluentd_enabler = FluentdEnabler()
         updated = fluentd_enabler.add_fluentd_to_compose(
             compose_file_path=compose_file_path,
             username=username,
@@ -378,15 +459,10 @@ class DockerComposeUtils():
         Returns:
             Mapped project path for use in Docker volumes
         """
-        volume_map = dict([os.environ.get('BASE_VOLUME_DIR_MAP', '').split(':', 1)])
-            
-        for base_path, volume_path in volume_map.items():
-            if project_path.startswith(base_path):
-                return project_path.replace(base_path, volume_path, 1)
-        return project_path
+        return map_project_path_to_volume(project_path)
 
     @staticmethod
-    def run_docker_compose_cleanup(project_path, user_id) -> CommandResult:
+    def run_docker_compose_cleanup(project_path, user_id, container_name=None) -> CommandResult:
         """
         Perform selective cleanup for a specific project without disturbing other running containers.
         Only cleans up resources related to this project.
@@ -394,38 +470,43 @@ class DockerComposeUtils():
         Args:
             project_path: Path to the project directory
             user_id: User identifier
+            container_name: Compose project name, when the caller has already generated it
             
         Returns:
             CommandResult indicating success/failure of cleanup operations
         """
-        os.chdir(project_path)
-        container_name = generate_unique_name(project_base_path=project_path, username=user_id)
+        if container_name is None:
+            container_name = generate_unique_name(project_base_path=project_path, username=user_id)
         
         try:
-            # Only clean up resources specific to this project
+            # Only clean up resources specific to this project. Dangling images are
+            # pruned by run_system_cleanup, which runs alongside this on deploy
             cleanup_commands = [
                 # Stop and remove only THIS project's containers
-                f'docker compose -p {container_name} down --volumes --remove-orphans',
-                # Remove only images specific to this project (if they exist)
-                f'docker images -q --filter "label=com.docker.compose.project={container_name}" | xargs -r docker rmi -f 2>/dev/null || true',
-                # Only remove dangling images (not affecting running containers)
-                'docker image prune -f'
+                ["docker", "compose", "-p", container_name, "down", "--volumes", "--remove-orphans"]
             ]
             
             results = []
+            cmd_handler = DockerCommandWithLogHandler(project_path)
             for cmd in cleanup_commands:
-                logger.info(f"Running selective cleanup command: {cmd}")
+                cmd_str = shlex.join(cmd)
+                logger.info(f"Running selective cleanup command: {cmd_str}")
                 try:
-                    result = DockerCommandWithLogHandler(project_path).run_docker_commands_with_logging(cmd, container_name=container_name)
+                    result = cmd_handler.run_docker_commands_with_logging(cmd, container_name=container_name)
                     if result:
                         results.append(result)
                         if not result.success:
-                            logger.warning(f"Cleanup command failed (non-critical): {cmd} - {result.error}")
+                            logger.warning(f"Cleanup command failed (non-critical): {cmd_str} - {result.error}")
                     else:
-                        logger.warning(f"Cleanup command returned None: {cmd}")
+                        logger.warning(f"Cleanup command returned None: {cmd_str}")
                 except Exception as cmd_error:
-                    logger.warning(f"Error running cleanup command '{cmd}': {str(cmd_error)}")
+                    logger.warning(f"Error running cleanup command '{cmd_str}': {str(cmd_error)}")
                     # Continue with other cleanup commands even if one fails
+
+            # Remove only images specific to this project (if they exist)
+            image_result = DockerUtils.remove_project_images(project_path, container_name)
+            if not image_result.success:
+                logger.warning(f"Removing project images failed (non-critical): {image_result.error}")
                     
             # Return success if at least the main down command succeeded
             if results and results[0].success:
@@ -442,9 +523,8 @@ class DockerComposeUtils():
                 )
                 
         except Exception as e:
-            error_msg = f"Error during selective cleanup: {traceback.format_exc()}"
-            logger.error(error_msg)
-            return CommandResult(success=False, error=error_msg)
+            logger.exception("Error during selective cleanup")
+            return CommandResult(success=False, error=f"Error during selective cleanup: {str(e)}")
 
     @staticmethod
     def run_system_cleanup() -> CommandResult:
@@ -466,20 +546,33 @@ class DockerComposeUtils():
                 'docker volume prune -f'
             ]
             
-            results = []
+            # The commands touch disjoint parts of the daemon (images, build cache,
+            # volumes), so start them all and then wait for each
+            processes = []
             for cmd in safe_cleanup_commands:
                 logger.info(f"Running safe system cleanup command: {cmd}")
                 try:
-                    # Use a simple command execution for system cleanup
-                    import subprocess
-                    result = subprocess.run(cmd.split(), capture_output=True, text=True, timeout=60)
-                    if result.returncode == 0:
+                    processes.append((cmd, subprocess.Popen(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)))
+                except Exception as cmd_error:
+                    logger.warning(f"Error running safe cleanup command '{cmd}': {str(cmd_error)}")
+                    processes.append((cmd, None))
+
+            results = []
+            for cmd, process in processes:
+                if process is None:
+                    results.append(False)
+                    continue
+                try:
+                    _, stderr = process.communicate(timeout=60)
+                    if process.returncode == 0:
                         logger.info(f"Safe cleanup command succeeded: {cmd}")
                         results.append(True)
                     else:
-                        logger.warning(f"Safe cleanup command failed: {cmd} - {result.stderr}")
+                        logger.warning(f"Safe cleanup command failed: {cmd} - {stderr}")
                         results.append(False)
                 except Exception as cmd_error:
+                    process.kill()
+                    process.communicate()
                     logger.warning(f"Error running safe cleanup command '{cmd}': {str(cmd_error)}")
                     results.append(False)
                     
@@ -493,6 +586,5 @@ class DockerComposeUtils():
             )
                 
         except Exception as e:
-            error_msg = f"Error during safe system cleanup: {traceback.format_exc()}"
-            logger.error(error_msg)
-            return CommandResult(success=True, error=error_msg)  # Don't fail deployment for cleanup issues
\ No newline at end of file
+            logger.exception("Error during safe system cleanup")
+            return CommandResult(success=True, error=f"Error during safe system cleanup: {str(e)}")  # Don't fail deployment for cleanup issues
\ No newline at end of file
@@ -1,10 +1,14 @@
 import subprocess
 import asyncio
 import os
+import json
 from typing import Optional
+from docker.context import ContextAPI
+from docker.context.config import get_meta_file
+from docker.errors import ContextAlreadyExists, DockerException
 from app.repositories.workspace_repository import WorkspaceRepository
 from app.custom_logging import logger
-from app.docker.helper_functions import generate_context_name_from_user_workspace
+from app.docker.helper_functions import generate_context_name_from_user_workspace, write_file_atomically
 from app.models.exceptions.known_exceptions import (
     VMNotFoundException,
     DockerContextSetException
@@ -40,6 +44,21 @@ class DockerContextManager:
         if os.path.exists(known_hosts):
             subprocess.run(["ssh-keygen", "-R", host], check=False)
 
+    @staticmethod
+    def _set_context_description(context_name: str, description: str):
+        """
+        Store the description shown by `docker context ls` in the context's meta file.
+        ContextAPI.create_context has no parameter for it; failures are only logged.
+        """
+        meta_file = get_meta_file(context_name)
+        try:
+            with open(meta_file) as f:
+                meta = json.load(f)
+            meta.setdefault("Metadata", {})["Description"] = description
+            write_file_atomically(meta_file, json.dumps(meta).encode())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not set description of Docker context '{context_name}': {str(e)}")
+
     @staticmethod
     async def set_context_for_user_workspace(username: str, workspace_name: str, user: str = 'azureuser')-> DockerContextResult:
         """
@@ -60,13 +79,9 @@ class DockerContextManager:
         # Remove known host entry to avoid SSH key verification issues
         DockerContextManager._remove_known_host(host)
         
-        # Check if context already exists
-        result = subprocess.run(
-            ["docker", "context", "inspect", context_name], 
-            capture_output=True, 
-            check=False
-        )
-        if result.returncode == 0:
+        # Check if context already exists. ContextAPI works on the same context store
+        # as the docker CLI, without starting the CLI for every check
+        if ContextAPI.get_context(context_name) is not None:
             # Context already exists, no need to create it again
             logger.debug(f"Docker context '{context_name}' already exists.")
             return DockerContextResult(
@@ -77,17 +92,17 @@ class DockerContextManager:
         # Create Docker context (SSH config is already set up in Dockerfile)
         logger.info(f"Creating Docker context '{context_name}' with host '{docker_host}'")
         
-        create_result = subprocess.run([
-            "docker", "context", "create", context_name,
-            "--docker", f"host={docker_host}",
-            "--description", f"Workspace {username}/{workspace_name} context"
-        ], capture_output=True, check=False)
-        
-        if create_result.returncode != 0:
-            error_output = create_result.stderr.decode().strip()
-            error_msg = f"Failed to create Docker context '{context_name}': {error_output}"
+        try:
+            ContextAPI.create_context(context_name, host=docker_host)
+        except ContextAlreadyExists:
+            # Created by a concurrent operation on the same workspace
+            logger.debug(f"Docker context '{context_name}' already exists.")
+        except DockerException as e:
+            error_msg = f"Failed to create Docker context '{context_name}': {str(e)}"
             logger.error(error_msg)
-            raise DockerContextSetException(error_msg)
+            raise DockerContextSetException(error_msg) from e
+        else:
+            DockerContextManager._set_context_description(context_name, f"Workspace {username}/{workspace_name} context")
         
         logger.info(f"Docker context '{context_name}' created successfully")
         return DockerContextResult(
@@ -101,14 +116,10 @@ class DockerContextManager:
         Removes the Docker context for the user workspace.
         """
         context_name = generate_context_name_from_user_workspace(username, workspace_name)
-        result = subprocess.run(
-            ["docker", "context", "rm", context_name],
-            capture_output=True,
-            check=False
-        )
-        if result.returncode == 0:
-            logger.info(f"Docker context '{context_name}' removed successfully.")
-            return True
-        else:
-            logger.error(f"Failed to remove Docker context '{context_name}': {result.stderr.decode().strip()}")
-            return False
\ No newline at end of file
+        try:
+            ContextAPI.remove_context(context_name)
+        except DockerException as e:
+            logger.error(f"Failed to remove Docker context '{context_name}': {str(e)}")
+            return False
+        logger.info(f"Docker context '{context_name}' removed successfully.")
+        return True
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import psutil
 import time
@@ -8,6 +9,7 @@ import shlex
 import subprocess
 from app.transient_store.redis_store import redis_store
 from threading import Event, Thread
+from typing import List, Tuple, Union
 from app.custom_logging import logger
 from .helper_functions import get_service_log_file_path, get_build_log_file_path
 from app.workspace_monitoring.compose_log_watcher import ComposeLogWatcher
@@ -45,24 +47,50 @@ class DockerCommandWithLogHandler:
     def __init__(self, project_base_path=None):
         self.project_base_path = project_base_path
 
-    def run_docker_commands_with_logging(self, command: str, container_name: str, retain_logs: bool = False) -> CommandResult:
-        try:
-            log_file = get_build_log_file_path(project_base_path=self.project_base_path, project_name=container_name)
+    @staticmethod
+    def _to_argv(command: Union[str, List[str]]) -> Tuple[List[str], str]:
+        # argv lists are executed as-is; strings are split. The joined form is for logs only
+        if isinstance(command, str):
+            return shlex.split(command), command
+        return list(command), shlex.join(command)
 
-            # Remove any existing log with the same name
-            if os.path.exists(log_file) and not retain_logs:
-                os.remove(log_file)
+    def _prepare_log_file(self, container_name: str, retain_logs: bool) -> str:
+        log_file = get_build_log_file_path(project_base_path=self.project_base_path, project_name=container_name)
 
-            # Set up the rotating file handler
-            handler = RotatingFileHandler(
-                log_file,
-                maxBytes=500*1024,
-                backupCount=5
-            )
+        # Remove any existing log with the same name
+        if os.path.exists(log_file) and not retain_logs:
+            os.remove(log_file)
+        return log_file
+
+    @staticmethod
+    def _record_command_result(log_file: str, command: str, stdout: str, stderr: str,
+                               success: bool, retain_logs: bool) -> CommandResult:
+        # Log the output to build.log
+        with open(log_file, 'a') as f:
+            f.write(f"Command: {command}\n")
+            f.write(f"Output:\n{stdout}\n")
+            if stderr:
+                f.write(f"Errors:\n{stderr}\n")
+            f.write(f"Status: {'Success' if success else 'Failed'}\n")
+            f.write("-" * 80 + "\n")
+
+        if stderr and not success:
+            logger.error(f"Command failed: {stderr}")
+            return CommandResult(success=False, output=stdout, error=stderr)
+
+        if stdout and retain_logs:
+            logger.info(f"Command output logged to {log_file}")
+
+        return CommandResult(success=True, output=stdout)
+
+    def run_docker_commands_with_logging(self, command: Union[str, List[str]], container_name: str, retain_logs: bool = False) -> CommandResult:
+        try:
+            argv, command = self._to_argv(command)
+            log_file = self._prepare_log_file(container_name, retain_logs)
 
             # Run the command and capture output
             process = subprocess.Popen(
-                shlex.split(command),
+                argv,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 universal_newlines=True,
@@ -71,24 +99,42 @@ class DockerCommandWithLogHandler:
 
             stdout, stderr = process.communicate()
             success = process.returncode == 0
+            return self._record_command_result(log_file, command, stdout, stderr, success, retain_logs)
 
-            # Log the output to build.log
-            with open(log_file, 'a') as f:
-                f.write(f"Command: {command}\n")
-                f.write(f"Output:\n{stdout}\n")
-                if stderr:
-                    f.write(f"Errors:\n{stderr}\n")
-                f.write(f"Status: {'Success' if success else 'Failed'}\n")
-                f.write("-" * 80 + "\n")
+        except Exception as e:
+            error_msg = f"Error executing command {command}: {traceback.format_exc()}"
+            logger.error(error_msg)
+            return CommandResult(success=False, error=error_msg)
 
-            if stderr and not success:
-                logger.error(f"Command failed: {stderr}")
-                return CommandResult(success=False, output=stdout, error=stderr)
+    async def run_docker_commands_with_logging_async(self, command: Union[str, List[str]], container_name: str, retain_logs: bool = False) -> CommandResult:
+        """
+        Async variant of run_docker_commands_with_logging that awaits the docker CLI
+        instead of blocking the event loop while it runs.
 
-            if stdout and retain_logs:
-                logger.info(f"Command output logged to {log_file}")
+        Args:
+            command: Command to execute, as a string or an argv list
+            container_name: Compose project name, used to name the build log
+            retain_logs: Whether to keep the existing build log
 
-            return CommandResult(success=True, output=stdout)
+        Returns:
+            CommandResult: Result of the command execution
+        """
+        try:
+            argv, command = self._to_argv(command)
+            log_file = self._prepare_log_file(container_name, retain_logs)
+
+            process = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.project_base_path
+            )
+
+            stdout_bytes, stderr_bytes = await process.communicate()
+            stdout = stdout_bytes.decode(errors='replace')
+            stderr = stderr_bytes.decode(errors='replace')
+            success = process.returncode == 0
+            return self._record_command_result(log_file, command, stdout, stderr, success, retain_logs)
 
         except Exception as e:
             error_msg = f"Error executing command {command}: {traceback.format_exc()}"
@@ -223,7 +269,6 @@ class DockerComposeLogHandler:
             # Create and start log watcher for this stack
             log_watcher = ComposeLogWatcher(
                 stack_name=project_name,
-                compose_file=compose_file,
                 project_name=project_name,
                 project_path=self.project_logs_path
             )
@@ -1,10 +1,15 @@
+import copy
 import yaml
 import os
+from pathlib import Path
 from typing import Dict, Any
 from dotenv import load_dotenv
+from .helper_functions import write_file_atomically, YAML_LOADER, YAML_DUMPER
 
 # Load environment variables
 load_dotenv()
+
+
 class FluentdEnabler:
     def __init__(self):
         self.fluentd_host = os.environ.get('FLUENTD_HOST', 'localhost')
@@ -25,17 +30,41 @@ class FluentdEnabler:
         Returns:
             Path to the modified compose file
         """
-        with open(compose_file_path, 'r') as file:
-            compose_data = yaml.safe_load(file)
+        compose_data = yaml.load(Path(compose_file_path).read_bytes(), Loader=YAML_LOADER)
+        original_compose_data = copy.deepcopy(compose_data)
+        
+        if not self.add_fluentd_to_compose_data(compose_data, username, workspace):
+            return False  # No services found in the compose file
+        
+        # Already configured (e.g. a redeploy): skip serializing and rewriting the file
+        if compose_data == original_compose_data:
+            return True
+        
+        # Write the modified compose file
+        write_file_atomically(
+            compose_file_path,
+            yaml.dump(compose_data, Dumper=YAML_DUMPER, default_flow_style=False, indent=2, encoding='utf-8')
+        )
+        
+        return True
+
+    def add_fluentd_to_compose_data(self, compose_data: Dict[str, Any], username: str, workspace: str) -> bool:
+        """
+        Add fluentd logging driver to all services of an already parsed compose file, in place.
         
-        if 'services' not in compose_data:
+        Args:
+            compose_data: Parsed docker-compose content
+            username: Username for the log tag
+            workspace: Workspace name for the log tag
+            
+        Returns:
+            False if the compose data has no services, True otherwise
+        """
+        if not compose_data or 'services' not in compose_data:
             return False  # No services found in the compose file
         
         # Configure fluentd logging for each service
         for _, service_config in compose_data['services'].items():
-            if 'logging' not in service_config:
-                service_config['logging'] = {}
-            
             service_config['logging'] = {
                 'driver': 'fluentd',
                 'options': {
@@ -44,8 +73,7 @@ class FluentdEnabler:
                 }
             }
         
-        # Write the modified compose file
-        with open(compose_file_path, 'w') as file:
-            yaml.dump(compose_data, file, default_flow_style=False, indent=2)
-        
-        return True
\ No newline at end of file
+        return True
+
+# Create global instance
+fluentd_enabler = FluentdEnabler()
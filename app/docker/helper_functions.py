@@ -1,7 +1,27 @@
 from pathlib import Path
+import functools
+import re
 import os
+import shutil
+import tempfile
+import yaml
 from dotenv import load_dotenv
 load_dotenv()
+
+# libyaml-backed loader/dumper when PyYAML was built with it
+_BASE_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+class ComposeYamlLoader(_BASE_YAML_LOADER):
+    """Safe loader for compose files without the timestamp resolver, so date-like
+    strings stay strings and scalars are matched against one regex fewer"""
+
+ComposeYamlLoader.yaml_implicit_resolvers = {
+    first_char: [(tag, regexp) for tag, regexp in resolvers if tag != 'tag:yaml.org,2002:timestamp']
+    for first_char, resolvers in _BASE_YAML_LOADER.yaml_implicit_resolvers.items()
+}
+YAML_LOADER = ComposeYamlLoader
+
 def extract_user_id(user_id):
     """Extract user ID from email"""
     return user_id.replace(".", "").split("@")[0]
@@ -32,6 +52,7 @@ def extract_username_and_workspace_from_path(project_path: str) -> tuple[str, st
         return username, workspace_name
     raise ValueError(f"Could not extract username and workspace from path '{project_path}': {str(e)}")
 
+@functools.lru_cache(maxsize=4096)
 def generate_unique_name(project_base_path=None, username=None):
     """Generate a unique name using project and user ID"""
     project_name = Path(project_base_path).name
@@ -39,6 +60,7 @@ def generate_unique_name(project_base_path=None, username=None):
     username = extract_user_id(user_id=username)
     return f"{sanitized_name}-{username}"
 
+@functools.lru_cache(maxsize=4096)
 def generate_project_name_from_user_workspace(username: str, workspace_name: str) -> str:
     """
     Generate Docker Compose project name from username and workspace name
@@ -57,6 +79,80 @@ def generate_project_name_from_user_workspace(username: str, workspace_name: str
     extracted_user_id = extract_user_id(username)
     return f"{sanitized_workspace}-{extracted_user_id}"
 
+def write_file_atomically(file_path: str, data: bytes) -> None:
+    """
+    Write data to a uniquely named temporary file next to file_path, flush it to
+    disk and move it into place, so a crash mid-write can't leave file_path
+    truncated and concurrent writers can't interleave. The file keeps the mode of
+    the file it replaces (0644 for new files); the temporary file is removed if
+    anything fails.
+
+    Args:
+        file_path: Path of the file to write
+        data: Full file content
+    """
+    fd, tmp_file_path = tempfile.mkstemp(
+        dir=os.path.dirname(file_path) or '.', prefix=f".{os.path.basename(file_path)}.", suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_file_path)
+        else:
+            # mkstemp creates the file as 0600
+            os.chmod(tmp_file_path, 0o644)
+        os.replace(tmp_file_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_file_path)
+        except OSError:
+            pass
+        raise
+
+@functools.lru_cache(maxsize=8)
+def parse_volume_dir_map(volume_dir_map: str) -> tuple[tuple[str, str], ...]:
+    """
+    Parse a BASE_VOLUME_DIR_MAP value into (base_path, volume_path) pairs.
+
+    Mappings are separated by ';' or ',' and each maps a local base path to a volume
+    path with '=' or ':', e.g. "/app/deployments=/home/user/deployments" or
+    "/app/deployments:/home/user/deployments"; '=' takes precedence when an entry
+    contains both. Entries without a separator or with an empty base path
+    (including an empty value) are ignored, since an empty prefix would match every
+    path. Pairs are ordered longest base path first so nested mappings win over
+    their parents.
+
+    Args:
+        volume_dir_map: Raw BASE_VOLUME_DIR_MAP value
+
+    Returns:
+        tuple of (base_path, volume_path) pairs
+    """
+    pairs = (
+        tuple(entry.strip().split('=' if '=' in entry else ':', 1))
+        for entry in re.split(r'[;,]', volume_dir_map)
+        if '=' in entry or ':' in entry
+    )
+    return tuple(sorted((pair for pair in pairs if pair[0]), key=lambda pair: len(pair[0]), reverse=True))
+
+def map_project_path_to_volume(project_path: str) -> str:
+    """
+    Replace the local base path prefix of project_path with its volume path
+    according to BASE_VOLUME_DIR_MAP; unmapped paths are returned unchanged.
+
+    A base path only matches whole path components, so /app/deploy does not
+    map /app/deployments/x.
+    """
+    for base_path, volume_path in parse_volume_dir_map(os.environ.get('BASE_VOLUME_DIR_MAP', '')):
+        base_path = base_path.rstrip('/')
+        if project_path == base_path or project_path.startswith(base_path + '/'):
+            return volume_path + project_path[len(base_path):]
+    return project_path
+
+@functools.lru_cache(maxsize=4096)
 def generate_context_name_from_user_workspace(username: str, workspace_name: str) -> str:
     """
     Generate Docker context name from username and workspace name
@@ -2,8 +2,11 @@
 import yaml
 import os
 import copy
-from typing import Dict, Any
+from pathlib import Path
+from typing import Dict, Any, Tuple
 from app.custom_logging import logger
+from .helper_functions import write_file_atomically, YAML_LOADER, YAML_DUMPER
+
 
 class TraefikLabeler:
     """
@@ -20,6 +23,9 @@ class TraefikLabeler:
         """
         self.domain_base = domain_base
         self.network_name = network_name
+        # Parts of the labels that don't depend on the service, built once per labeler
+        self._domain_suffix = f".{domain_base}".replace("_", "-").replace(" ", "-")
+        self._static_labels = ("traefik.enable=true", f"traefik.docker.network={network_name}")
     
     def add_traefik_labels(self, compose_file: str, project_name: str, output_file) -> str:
         """
@@ -33,17 +39,31 @@ class TraefikLabeler:
             Path to the generated compose file with Traefik labels
         """
         # Read the docker-compose file
-        with open(compose_file, 'r') as f:
-            compose_data = yaml.safe_load(f)
+        compose_data = yaml.load(Path(compose_file).read_bytes(), Loader=YAML_LOADER)
         
         # Apply Traefik configuration
         updated_compose, service_urls = self._process_compose_data(compose_data, project_name)
         # Write the updated compose file
-        with open(output_file, 'w') as f:
-            yaml.dump(updated_compose, f, default_flow_style=False, sort_keys=False)
+        write_file_atomically(
+            output_file,
+            yaml.dump(updated_compose, Dumper=YAML_DUMPER, default_flow_style=False, sort_keys=False, encoding='utf-8')
+        )
         
         return service_urls
     
+    def label_compose_data(self, compose_data: Dict[str, Any], project_name: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Add Traefik labels to already parsed compose data; the input is not modified.
+        
+        Args:
+            compose_data: Docker Compose data as dictionary
+            project_name: Project name for the deployment
+            
+        Returns:
+            Updated Docker Compose data with Traefik labels and a dict of service URLs
+        """
+        return self._process_compose_data(compose_data, project_name)
+    
     def _process_compose_data(self, compose_data: Dict[str, Any], project_name: str) -> Dict[str, Any]:
         """
         Process the compose data to add Traefik labels.
@@ -106,22 +126,20 @@ class TraefikLabeler:
                     for k, v in old_labels.items():
                         service_config["labels"].append(f"{k}={v}")
                 
-                # Create service specific domain
-                service_domain = f"{service_name}-{project_name}.{self.domain_base}"
-                service_domain = service_domain.replace("_", "-").replace(" ", "-")
-                logger.info(f"Service domain: {service_domain}")
+                # Create service specific router name and domain
                 router_name = f"{service_name}-{project_name}".replace("_", "-").replace(" ", "-")
-                logger.info(f"Router domain: {router_name}")
+                service_domain = router_name + self._domain_suffix
+                logger.info(f"Service domain: {service_domain}, router: {router_name}")
                 # Add only essential Traefik labels
-                traefik_labels = [
-                    "traefik.enable=true",
-                    f"traefik.docker.network={self.network_name}",
-                    f"traefik.http.routers.{router_name}.rule=Host(`{service_domain}`)",
-                    f"traefik.http.routers.{router_name}.entrypoints=websecure",
-                    f"traefik.http.routers.{router_name}.tls=true",
-                    f"traefik.http.routers.{router_name}.tls.certresolver=letsencrypt",
+                router_prefix = f"traefik.http.routers.{router_name}"
+                traefik_labels = (
+                    *self._static_labels,
+                    f"{router_prefix}.rule=Host(`{service_domain}`)",
+                    f"{router_prefix}.entrypoints=websecure",
+                    f"{router_prefix}.tls=true",
+                    f"{router_prefix}.tls.certresolver=letsencrypt",
                     f"traefik.http.services.{router_name}.loadbalancer.server.port={target_port}"
-                ]
+                )
                 service_urls[service_name] = f"https://{service_domain}"
 
                 # Add labels that don't already exist
@@ -161,3 +179,6 @@ class TraefikLabeler:
         return None
 
 
+
+# Create global instance
+traefik_labeler = TraefikLabeler()
@@ -1,13 +1,71 @@
-from .helper_functions import generate_unique_name, extract_user_id
+from .helper_functions import generate_unique_name, extract_user_id, write_file_atomically, YAML_LOADER, YAML_DUMPER
+import functools
 import os
 from pathlib import Path
 import json
+import orjson
+import yaml
 from app.custom_logging import logger
-from typing import Dict, Any, Optional
-from .docker_log_handler import DockerCommandWithLogHandler
+from typing import Dict, Any, List, Optional, Tuple
+from .docker_log_handler import DockerCommandWithLogHandler, CommandResult
 from .config import DockerConfig
 import subprocess
 
+# In order of preference; a JSON compose file skips YAML parsing entirely
+COMPOSE_FILE_NAMES = ('docker-compose.json', 'docker-compose.yml', 'docker-compose.yaml')
+
+@functools.lru_cache(maxsize=256)
+def _find_compose_file(project_path: str, mtime_ns: int) -> str:
+    """Locate the compose file in a project; cached per path and directory mtime"""
+    # Common case: compose file at the top level, found with a single directory read
+    with os.scandir(project_path) as entries:
+        found = {entry.name.lower(): entry.path for entry in entries
+                 if entry.name.lower() in COMPOSE_FILE_NAMES and entry.is_file()}
+    for name in COMPOSE_FILE_NAMES:
+        if name in found:
+            return found[name]
+    compose_file_name = DockerUtils.get_service_paths(project_path=project_path, only_compose=True)[0]
+    return os.path.join(project_path, compose_file_name)
+
+def _compose_file_version(compose_file_path: str) -> Tuple[int, int, int]:
+    """
+    Cache key for a compose file's content. write_compose_file replaces the file,
+    which gives it a new inode, so a rewrite within the same mtime tick that keeps
+    the size is still seen as a new version.
+    """
+    stat = os.stat(compose_file_path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+@functools.lru_cache(maxsize=64)
+def _load_compose_file(compose_file_path: str, version: Tuple[int, int, int]) -> Dict[str, Any]:
+    """Parse a compose file; cached per path and file version (inode, mtime, size)"""
+    # Raw bytes in one read: no text IO layer, and libyaml parses the whole
+    # buffer without calling back into Python for every chunk of a file object
+    data = Path(compose_file_path).read_bytes()
+    if compose_file_path.endswith('.json'):
+        return orjson.loads(data)
+    return yaml.load(data, Loader=YAML_LOADER)
+
+def _normalize_port(port: Any) -> Optional[Dict[str, str]]:
+    """Normalize a short ("8080:80", "80") or long form port entry to {"published", "target"}"""
+    if isinstance(port, dict):
+        if not port.get('published'):
+            return None
+        return {"published": str(port['published']), "target": str(port.get('target', ''))}
+    parts = str(port).split('/')[0].split(':')
+    return {"published": parts[-2] if len(parts) > 1 else parts[0], "target": parts[-1]}
+
+@functools.lru_cache(maxsize=64)
+def _load_compose_ports(compose_file_path: str, version: Tuple[int, int, int]) -> Dict[str, List[Dict[str, str]]]:
+    """Published ports per service, normalized once per file version"""
+    compose_data = _load_compose_file(compose_file_path, version)
+    services_ports = {}
+    for service_name, service_config in (compose_data.get('services') or {}).items():
+        ports = [port for port in map(_normalize_port, (service_config or {}).get('ports') or []) if port]
+        if ports:
+            services_ports[service_name] = ports
+    return services_ports
+
 
 class DockerUtils():
 
@@ -79,6 +137,115 @@ class DockerUtils():
                 return f.read().strip
         return generate_unique_name(project_base_path=project_path, username=user_id) + f".{DockerConfig.BASE_DOMAIN}"
 
+    @staticmethod
+    def remove_project_images(project_path, container_name, docker_command="docker") -> CommandResult:
+        """
+        Remove the images built for a compose project without a shell pipeline:
+        list the image IDs labelled with the project, then remove them all with a
+        single docker invocation (skipped when there are none).
+
+        Args:
+            project_path: Project directory (used for the command log)
+            container_name: Compose project name
+            docker_command: Docker CLI prefix, e.g. "docker --context <name>"
+
+        Returns:
+            CommandResult of the removal, or of the listing if it failed or found nothing
+        """
+        handler = DockerCommandWithLogHandler(project_path)
+        list_result = handler.run_docker_commands_with_logging(
+            f'{docker_command} images -q --filter label=com.docker.compose.project={container_name}',
+            container_name=container_name,
+            retain_logs=True
+        )
+        if not list_result.success:
+            return list_result
+        # The same image can be listed once per tag
+        image_ids = list(dict.fromkeys((list_result.output or "").split()))
+        if not image_ids:
+            return CommandResult(success=True, output="No project images to remove")
+        return handler.run_docker_commands_with_logging(
+            f'{docker_command} image rm -f {" ".join(image_ids)}',
+            container_name=container_name,
+            retain_logs=True
+        )
+
+    @staticmethod
+    def get_compose_file_path(project_path: str) -> str:
+        """
+        Get the path to the docker-compose.yml file in the project directory.
+
+        The project tree is only walked again when the project directory changes
+        or the previously found file has disappeared.
+        
+        Args:
+            project_path: Path to the project directory
+        Returns:
+            The path to the docker-compose.yml file
+        """
+        mtime_ns = os.stat(project_path).st_mtime_ns
+        compose_file_path = _find_compose_file(project_path, mtime_ns)
+        if not os.path.exists(compose_file_path):
+            # Moved within a subdirectory, which doesn't change the project directory's mtime
+            _find_compose_file.cache_clear()
+            compose_file_path = _find_compose_file(project_path, mtime_ns)
+        if not os.path.exists(compose_file_path):
+            raise FileNotFoundError(f"Docker Compose file not found at {compose_file_path}")
+        return compose_file_path
+
+    @staticmethod
+    def read_compose_file(compose_file_path: str) -> Dict[str, Any]:
+        """
+        Parse a docker-compose file (YAML, or JSON for .json files).
+
+        The parse is cached until the file changes and shared between callers,
+        so callers that modify the content must copy it first.
+
+        Args:
+            compose_file_path: Path to the docker-compose file
+        Returns:
+            The parsed compose content
+        """
+        return _load_compose_file(compose_file_path, _compose_file_version(compose_file_path))
+
+    @staticmethod
+    def read_compose_ports(compose_file_path: str) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Get the published ports of each service in a docker-compose file.
+
+        Short ("8080:80") and long form ({published: 8080, target: 80}) entries are
+        normalized to {"published": "8080", "target": "80"} when the file is parsed;
+        entries without a published port are dropped.
+
+        Args:
+            compose_file_path: Path to the docker-compose file
+        Returns:
+            A dictionary mapping service names to their normalized ports
+        """
+        return _load_compose_ports(compose_file_path, _compose_file_version(compose_file_path))
+
+    @staticmethod
+    def write_compose_file(compose_file_path: str, compose_content: Dict[str, Any], indent: Optional[int] = None,
+                           sort_keys: bool = True) -> None:
+        """
+        Write compose content atomically so a crash can't leave the file truncated.
+        .json files are written as JSON, everything else as YAML.
+
+        Args:
+            compose_file_path: Path to the docker-compose file
+            compose_content: Compose content to write
+            indent: YAML indentation (JSON is always indented by 2)
+            sort_keys: Sort mapping keys
+        """
+        if compose_file_path.endswith('.json'):
+            options = orjson.OPT_INDENT_2 | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+            data = orjson.dumps(compose_content, option=options)
+        else:
+            # Dumped straight to UTF-8 bytes, skipping the text IO layer
+            data = yaml.dump(compose_content, Dumper=YAML_DUMPER, default_flow_style=False,
+                             indent=indent, sort_keys=sort_keys, encoding='utf-8')
+        write_file_atomically(compose_file_path, data)
+
     @staticmethod
     def get_service_paths(project_path, only_compose=False):
         """Get service paths for a docker-compose project"""
@@ -90,7 +257,7 @@ class DockerUtils():
             for root, _, files in os.walk(project_path):
                 for file in files:
                     file_path = Path(root) / file
-                    if file.lower() in ['docker-compose.yml', 'docker-compose.yaml']:
+                    if file.lower() in COMPOSE_FILE_NAMES:
                         docker_compose_paths.append(str(file_path))
                     elif file.lower() == 'dockerfile':
                         dockerfile_paths.append(str(file_path))
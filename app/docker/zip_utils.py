@@ -9,7 +9,45 @@ from .config import DockerConfig
 from app.models.exceptions.known_exceptions import ZipExtractionFailedException
 class ZipUtils:
     """Utilities for handling zip files in the Docker build process"""
-    
+
+    COPY_BUFFER_SIZE = 1024 * 1024  # 1 MiB
+
+    @staticmethod
+    def _get_real_fileno(file_obj):
+        """Return the OS file descriptor backing file_obj, or None if it is not a real file"""
+        # Asking a spooled file that is still in memory for fileno() would force it to disk
+        if isinstance(file_obj, tempfile.SpooledTemporaryFile) and not file_obj._rolled:
+            return None
+        try:
+            return file_obj.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    @staticmethod
+    def save_uploaded_file(source_file, destination_path: str) -> None:
+        """
+        Write an uploaded file object to destination_path.
+
+        Sources backed by a real file are copied in-kernel with os.sendfile; anything
+        else falls back to a buffered copy with a 1 MiB buffer.
+
+        Args:
+            source_file: Readable binary file object (e.g. UploadFile.file)
+            destination_path: Path of the file to create or overwrite
+        """
+        fd = os.open(destination_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as destination:
+            source_fd = ZipUtils._get_real_fileno(source_file)
+            if source_fd is not None and hasattr(os, 'sendfile'):
+                offset = source_file.tell()
+                while True:
+                    sent = os.sendfile(destination.fileno(), source_fd, offset, ZipUtils.COPY_BUFFER_SIZE)
+                    if sent == 0:
+                        break
+                    offset += sent
+            else:
+                shutil.copyfileobj(source_file, destination, ZipUtils.COPY_BUFFER_SIZE)
+
     @staticmethod
     def extract_zip_file(zip_file_path: str, user_name: str, project_name: str, base_directory: str = None) -> str:
         """
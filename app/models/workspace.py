@@ -68,6 +68,7 @@ class UserWorkspace(BaseModel):
     docker_image_name: Optional[str] = None
     deployed_versions: Optional[List[str]] = Field(default_factory=list)
     workspace_path: str
+    project_name: Optional[str] = None  # Docker Compose project name, set on creation
     service_url: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
@@ -3,6 +3,7 @@ from app.database import user_workspace_collection
 from app.models.workspace import UserWorkspace, LogWatcherInfo, VMConfig
 from app.models.exceptions.known_exceptions import (
     WorkspaceAlreadyExistsException)
+from app.docker.helper_functions import generate_project_name_from_user_workspace
 from datetime import datetime
 import re
 
@@ -12,6 +13,8 @@ class WorkspaceRepository:
     @staticmethod
     async def create_workspace(workspace: UserWorkspace) -> str:
         """Create a new workspace"""
+        if not workspace.project_name:
+            workspace.project_name = generate_project_name_from_user_workspace(workspace.username, workspace.workspace_name)
         workspace_dict = workspace.model_dump()
         # Ensure the deployed versions are in reverse chronological order
         workspace_dict["deployed_versions"] = workspace_dict.get("deployed_versions", [])
@@ -1,26 +1,46 @@
 """
 Docker Compose Log Watcher Module
 
-This module provides a minimalistic log watcher implementation using the Python watchdog library
-to monitor Docker Compose log files and process them through configurable processor classes.
+This module provides a minimalistic log watcher implementation using Linux inotify to monitor
+Docker Compose log files and process them through configurable processor classes. A single
+inotify instance and background thread serve every watched stack.
 """
 
+import ctypes
+import mmap
 import os
+import select
+import struct
+import threading
 import time
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 from app.custom_logging import logger
 from .workspace_monitor import WorkspaceMonitor
 
 
-class ComposeLogFileHandler(FileSystemEventHandler):
-    """Watchdog file handler for Docker Compose log files"""
+class ComposeLogFileHandler:
+    """File handler for Docker Compose log files"""
+
+    # Longest time a processed position may go unsaved while lines keep arriving
+    POSITION_FLUSH_INTERVAL = 1.0
+    # Changes signalled within this window after the first one are handled as one batch
+    DEBOUNCE_INTERVAL = 0.05
+    # Size of the window mapped per step when catching up on a large backlog
+    READ_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+    # Leading bytes remembered to recognise a file truncated and refilled past last_position
+    HEAD_FINGERPRINT_SIZE = 256
     
     def __init__(self, log_file_path: str, monitor:WorkspaceMonitor, start_position: int = None):
-        super().__init__()
         self.log_file_path = log_file_path
+        self._file_name = os.path.basename(log_file_path)
         self.monitor = monitor
         self.position_file = f"{log_file_path}.position"  # Store position in companion file
+        # Kept open for the handler's lifetime; None until the log file exists
+        self._fd = None
+        self._open_log_file()
+        # Bytes of an unterminated last line, already consumed from the file
+        self._partial_line = b""
+        # First bytes of the file as of the last read
+        self._head = b""
         
         # Determine starting position
         if start_position is not None:
@@ -32,6 +52,20 @@ class ComposeLogFileHandler(FileSystemEventHandler):
         
         # Save initial position
         self._save_position()
+        self._dirty_position = False
+        self._last_flush_ts = time.monotonic()
+
+        # Change notifications only set this flag; the reading and monitoring (which can
+        # involve slow LLM calls) runs on a per-handler worker so that a busy stack never
+        # holds up notifications for the others
+        self._pending = threading.Event()
+        self._closed = False
+        self._worker = threading.Thread(
+            target=self._process_pending_changes,
+            name=f"compose-log-{self._file_name}",
+            daemon=True
+        )
+        self._worker.start()
     
     def _load_last_position(self) -> int:
         """Load the last processed position from storage"""
@@ -58,50 +92,316 @@ class ComposeLogFileHandler(FileSystemEventHandler):
         logger.info("No saved position found, starting from beginning of new log file")
         return 0
     
+    def _open_log_file(self):
+        """Open the log file for reading if it exists and isn't open yet"""
+        if self._fd is None:
+            try:
+                self._fd = os.open(self.log_file_path, os.O_RDONLY | os.O_CLOEXEC | os.O_NONBLOCK)
+            except FileNotFoundError:
+                pass
+        return self._fd
+
+    def _read_new_lines(self) -> list:
+        """
+        Return the complete lines (as bytes) appended since last_position and advance past them.
+
+        If the log file has been rotated (replaced by a new file at the same path),
+        the rest of the old file is read first and then the new file from the start.
+        """
+        fd = self._open_log_file()
+        if fd is None:
+            return []
+        new_lines = self._read_from(fd)
+        if self._log_file_replaced(fd):
+            logger.info(f"Log file {self.log_file_path} was rotated, reopening")
+            # The old file won't grow any more, so its unterminated last line is complete
+            if self._partial_line:
+                new_lines.append(self._partial_line)
+                self._partial_line = b""
+            os.close(fd)
+            self._fd = None
+            self.last_position = 0
+            self._head = b""
+            fd = self._open_log_file()
+            if fd is not None:
+                new_lines += self._read_from(fd)
+        return new_lines
+
+    def _read_from(self, fd: int) -> list:
+        """
+        Read the complete lines after last_position from fd and advance past them.
+
+        The file is memory-mapped in windows of READ_CHUNK_SIZE, so the bytes come
+        straight from the page cache without an extra copy through read(). A trailing
+        line without a newline is held back until the rest of it has been written.
+        """
+        size = os.fstat(fd).st_size
+        # Truncated in place (e.g. copytruncate). A shrunken file is the common case; if it
+        # has already grown past last_position again, its changed first bytes give it away
+        if size < self.last_position or (self._head and os.pread(fd, len(self._head), 0) != self._head):
+            logger.info(f"Log file {self.log_file_path} was truncated, restarting from position 0")
+            self.last_position = 0
+            self._partial_line = b""
+            self._head = b""
+        new_lines = []
+        while self.last_position < size:
+            end = min(size, self.last_position + self.READ_CHUNK_SIZE)
+            # mmap offsets must be a multiple of the allocation granularity
+            map_offset = self.last_position - self.last_position % mmap.ALLOCATIONGRANULARITY
+            with mmap.mmap(fd, end - map_offset, flags=mmap.MAP_PRIVATE, prot=mmap.PROT_READ, offset=map_offset) as mm:
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+                data = self._partial_line + mm[self.last_position - map_offset:]
+            self.last_position = end
+            lines = data.splitlines()
+            self._partial_line = b"" if data.endswith(b"\n") else lines.pop()
+            # Skip blank and whitespace-only lines (C-level checks, no stripped copies)
+            new_lines.extend(line for line in lines if line and not line.isspace())
+        if len(self._head) < self.HEAD_FINGERPRINT_SIZE:
+            self._head = os.pread(fd, min(self.last_position, self.HEAD_FINGERPRINT_SIZE), 0)
+        return new_lines
+
+    def _log_file_replaced(self, fd: int) -> bool:
+        """Whether the path now refers to a different file than the open fd"""
+        try:
+            return os.stat(self.log_file_path).st_ino != os.fstat(fd).st_ino
+        except FileNotFoundError:
+            # Moved away and not recreated yet; keep reading the old file
+            return False
+
     def _save_position(self):
         """Save the current position to storage"""
         try:
-            with open(self.position_file, 'w') as f:
-                f.write(str(self.last_position))
-        except IOError as e:
+            fd = os.open(self.position_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                # Resume at the start of a line that hasn't been fully written yet
+                os.write(fd, str(self.last_position - len(self._partial_line)).encode())
+            finally:
+                os.close(fd)
+        except OSError as e:
             logger.warning(f"Could not save position: {e}")
+
+    def _flush_position(self):
+        """Persist the position if it changed since the last save"""
+        if self._dirty_position:
+            self._save_position()
+            self._dirty_position = False
+            self._last_flush_ts = time.monotonic()
     
-    def on_modified(self, event):
-        """Handle file modification events"""
-        if event.is_directory:
-            return
+    def on_modified(self, file_name: str):
+        """Handle a change notification for file_name inside the watched directory"""
+        if file_name == self._file_name:
+            self._pending.set()
+
+    def _process_pending_changes(self):
+        """Worker loop: process the new lines whenever a change has been signalled, coalescing bursts"""
+        try:
+            while True:
+                if not self._pending.wait(timeout=self.POSITION_FLUSH_INTERVAL):
+                    # Writes have gone quiet; save the position now rather than on the next burst
+                    self._flush_position()
+                    continue
+                if not self._closed:
+                    # Let a burst of writes finish so it is read and monitored in one go
+                    time.sleep(self.DEBOUNCE_INTERVAL)
+                self._pending.clear()
+                if self._closed:
+                    return
+                self._process_new_lines()
+        finally:
+            # The worker is the only user of the fd, so it is released here rather than in
+            # close(), which may return while a slow batch is still being monitored
+            self._flush_position()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _process_new_lines(self):
+        """Read the lines appended since the last position and hand them to the monitor"""
+        try:
+            new_lines = self._read_new_lines()
             
-        # Resolve symlinks and normalize both paths for comparison (works in production too)
-        event_path = os.path.realpath(event.src_path)
-        target_path = os.path.realpath(self.log_file_path)
-        
-        if event_path != target_path:
-            return
+            self.monitor.monitor(new_lines)
             
-        try:
-            with open(self.log_file_path, 'r') as f:
-                f.seek(self.last_position)
-                new_lines = f.readlines()
-                self.last_position = f.tell()
-                
-                self.monitor.monitor(new_lines)
-                
-                # Save position after processing
-                if new_lines:  # Only save if we actually processed something
-                    self._save_position()
-                        
+            # Save position after processing, at most once per flush interval
+            if new_lines:  # Only save if we actually processed something
+                self._dirty_position = True
+                if time.monotonic() - self._last_flush_ts > self.POSITION_FLUSH_INTERVAL:
+                    self._flush_position()
+                    
         except Exception as e:
             logger.error(f"Error processing log file changes: {str(e)}")
 
+    def close(self):
+        """
+        Stop the worker thread; changes signalled afterwards are ignored.
+
+        The worker saves the position and closes the log file as its last step. If it is
+        still busy with a batch after the timeout, that happens once the batch is done.
+        """
+        self._closed = True
+        self._pending.set()
+        if self._worker is not threading.current_thread():
+            self._worker.join(timeout=2)
+
+
+class InotifyComposeWatcher:
+    """
+    A single inotify instance shared by all compose log watchers.
+
+    One background thread waits on the inotify fd with epoll and dispatches change
+    notifications to the handlers registered for each watch descriptor. An eventfd
+    registered with the same epoll set wakes the thread up for shutdown.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_CLOEXEC = os.O_CLOEXEC
+    IN_NONBLOCK = os.O_NONBLOCK
+    WATCH_MASK = IN_MODIFY | IN_CREATE | IN_MOVED_TO
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+    READ_SIZE = 64 * 1024
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._inotify_fd = self._check(self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC))
+        self._wake_fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        self._epoll = select.epoll()
+        self._epoll.register(self._inotify_fd, select.EPOLLIN)
+        self._epoll.register(self._wake_fd, select.EPOLLIN)
+        self._lock = threading.Lock()
+        self._handlers = {}  # watch descriptor -> handlers watching that directory
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="compose-log-inotify", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _check(result: int) -> int:
+        """Raise OSError from errno if a libc call failed"""
+        if result < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return result
+
+    def schedule(self, handler: ComposeLogFileHandler, directory: str) -> int:
+        """
+        Start delivering change notifications for files in directory to handler.
+
+        Args:
+            handler: Handler whose on_modified is called with the changed file name
+            directory: Directory to watch (not recursive)
+
+        Returns:
+            int: Watch descriptor to pass to unschedule
+        """
+        with self._lock:
+            # The kernel returns the same descriptor when the directory is already watched
+            wd = self._check(self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(directory), self.WATCH_MASK))
+            self._handlers.setdefault(wd, []).append(handler)
+        return wd
+
+    def unschedule(self, handler: ComposeLogFileHandler, wd: int):
+        """Stop delivering notifications to handler; drops the kernel watch once unused"""
+        with self._lock:
+            handlers = self._handlers.get(wd)
+            if not handlers or handler not in handlers:
+                return
+            handlers.remove(handler)
+            if not handlers:
+                del self._handlers[wd]
+                # Fails with EINVAL if the directory is already gone, which is fine
+                self._libc.inotify_rm_watch(self._inotify_fd, wd)
+
+    def stop(self):
+        """Wake the background thread, wait for it to exit and release the descriptors"""
+        if not self._running:
+            return
+        self._running = False
+        os.eventfd_write(self._wake_fd, 1)
+        self._thread.join(timeout=2)
+        self._epoll.close()
+        os.close(self._wake_fd)
+        os.close(self._inotify_fd)
+
+    def _run(self):
+        """Background loop: block in epoll until inotify events arrive or stop() is called"""
+        while self._running:
+            try:
+                ready = self._epoll.poll()
+            except InterruptedError:
+                continue
+            for fd, _ in ready:
+                if fd == self._wake_fd:
+                    continue
+                try:
+                    self._dispatch(self._read_events())
+                except Exception as e:
+                    logger.error(f"Error dispatching log file events: {str(e)}")
+
+    def _read_events(self) -> set:
+        """Drain the inotify fd until EAGAIN and return the distinct (wd, file name) pairs"""
+        changes = set()
+        while True:
+            try:
+                buffer = os.read(self._inotify_fd, self.READ_SIZE)
+            except BlockingIOError:
+                return changes
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, name_len = self.EVENT_HEADER.unpack_from(buffer, offset)
+                offset += self.EVENT_HEADER.size
+                name = buffer[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                if mask & self.IN_Q_OVERFLOW:
+                    # Events were dropped; let every handler check its file
+                    changes.add((None, None))
+                elif not mask & self.IN_IGNORED:
+                    changes.add((wd, os.fsdecode(name)))
+
+    def _dispatch(self, changes: set):
+        """Notify the handlers registered for each changed file"""
+        with self._lock:
+            if (None, None) in changes:
+                targets = [(handler, handler._file_name) for handlers in self._handlers.values() for handler in handlers]
+            else:
+                targets = [(handler, name) for wd, name in changes for handler in self._handlers.get(wd, ())]
+        for handler, name in targets:
+            handler.on_modified(name)
+
+
+_shared_watcher = None
+_shared_watcher_lock = threading.Lock()
+
+
+def get_shared_watcher() -> InotifyComposeWatcher:
+    """Return the process-wide inotify watcher, creating it on first use"""
+    global _shared_watcher
+    with _shared_watcher_lock:
+        if _shared_watcher is None:
+            _shared_watcher = InotifyComposeWatcher()
+        return _shared_watcher
+
+
+def stop_shared_watcher():
+    """Stop the process-wide inotify watcher; called once at application shutdown"""
+    global _shared_watcher
+    with _shared_watcher_lock:
+        watcher, _shared_watcher = _shared_watcher, None
+    if watcher is not None:
+        watcher.stop()
+
 
 class ComposeLogWatcher:
-    """Log watcher instance for Docker Compose stacks using watchdog"""
+    """Log watcher instance for Docker Compose stacks using the shared inotify watcher"""
     
     def __init__(self, stack_name: str, project_name: str, project_path: str = None):
         self.stack_name = stack_name
         self.project_name = project_name
         self.project_path = project_path
-        self.observer = None
+        self._watcher = None
+        self._watch = None
         self.is_watching = False
         self.file_handler = None
         
@@ -117,7 +417,7 @@ class ComposeLogWatcher:
         
     def start_watching(self, log_file_path: str, start_from_beginning: bool = False):
         """
-        Start watching the log file using watchdog
+        Start watching the log file using the shared inotify watcher
         
         Args:
             log_file_path: Path to the log file to watch
@@ -136,10 +436,9 @@ class ComposeLogWatcher:
             if start_from_beginning:
                 # For new deployments, start from the beginning to capture everything
                 # remove any existing position file
-                            # Create log file if it doesn't exist
-                if not os.path.exists(log_file_path):
-                    with open(log_file_path, 'w') as f:
-                        f.write("")
+                # Create log file if it doesn't exist (atomically; never truncates an existing file)
+                fd = os.open(log_file_path, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o644)
+                os.close(fd)
                 position_file = f"{log_file_path}.position"
                 if os.path.exists(position_file):
                     os.remove(position_file)
@@ -152,24 +451,25 @@ class ComposeLogWatcher:
             # Set up file handler with position tracking
             self.file_handler = ComposeLogFileHandler(log_file_path, self.monitor, start_position)
             
-            # Set up observer
-            self.observer = Observer()
-            self.observer.schedule(self.file_handler, log_dir, recursive=False)
-            
-            # Start watching
-            self.observer.start()
+            # Register with the shared watcher
+            self._watcher = get_shared_watcher()
+            self._watch = self._watcher.schedule(self.file_handler, log_dir)
             self.is_watching = True
             
-            logger.info(f"Started watchdog log watcher for stack: {self.stack_name}")
+            logger.info(f"Started inotify log watcher for stack: {self.stack_name}")
             
         except Exception as e:
             logger.error(f"Error starting log watcher for {self.stack_name}: {str(e)}")
+            if self.file_handler is not None:
+                self.file_handler.close()
             
     def stop_watching(self):
         """Stop watching the log file"""
-        if self.observer and self.is_watching:
-            self.observer.stop()
-            self.observer.join(timeout=2)
+        if self._watch is not None and self.is_watching:
+            self._watcher.unschedule(self.file_handler, self._watch)
+            self.file_handler.close()
+            self._watcher = None
+            self._watch = None
             self.is_watching = False
             logger.info(f"Stopped log watcher for stack: {self.stack_name}")
             
@@ -31,6 +31,15 @@ class DummyLogProcessor:
             ## for each error log, send it to /task-handler/api
             logger.info(f"[LogProcessor-{self.stack_name}] Identified {len(result['errors'])} error logs")
 
+    def process_log_line(self, log_line: str):
+        """
+        Process a single log line from the Docker Compose stack
+        
+        Args:
+            log_line (str): Log line to process
+        """
+        self.processed_count += 1
+
     def get_stats(self):
         """Get processing statistics"""
         return {
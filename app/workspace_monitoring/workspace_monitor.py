@@ -5,7 +5,8 @@ This module provides a workspace monitor that analyzes log stashes for errors
 and submits bug reports through the error reporter system.
 """
 
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Union
 from app.custom_logging import logger
 from app.workspace_monitoring.log_processor.error_identifier import ErrorIdentifier
 from app.workspace_monitoring.error_reporter import ErrorReporter
@@ -39,12 +40,14 @@ class WorkspaceMonitor:
         
         logger.info(f"Initialized WorkspaceMonitor for workspace '{self.workspace_name}' (user: {self.user_id})")
     
-    def monitor(self, log_stash: str) -> Dict[str, Any]:
+    def monitor(self, log_stash: Union[str, List[str], List[bytes]]) -> Dict[str, Any]:
         """
         Monitor a log stash by checking for errors and submitting bug reports.
         
         Args:
-            log_stash str: The log stash to process, typically a list of log lines.
+            log_stash: The log stash to process, typically a list of log lines.
+                Lines read straight from a log file may be bytes; they are decoded
+                once for the whole stash.
             
         Returns:
             Dict[str, Any]: Summary of monitoring results
@@ -52,10 +55,15 @@ class WorkspaceMonitor:
         if not log_stash:
             return {"success": True, "message": "No logs to process", "errors_found": 0, "bugs_submitted": 0}
         
-        logger.debug(f"[WorkspaceMonitor-{self.workspace_name}] Monitoring {len(log_stash)} log lines")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[WorkspaceMonitor-%s] Monitoring %d log lines", self.workspace_name, len(log_stash))
         
         try:
-            log_stash = "\n".join(log_stash) if isinstance(log_stash, List) else log_stash
+            if isinstance(log_stash, list):
+                if isinstance(log_stash[0], bytes):
+                    log_stash = b"\n".join(log_stash).decode('utf-8', errors='replace')
+                else:
+                    log_stash = "\n".join(log_stash)
             # Identify errors using ErrorIdentifier
             error_result = self.error_identifier.identify_errors(log_stash)
             
@@ -69,7 +77,7 @@ class WorkspaceMonitor:
             errors_found = len(error_logs)
             
             if errors_found == 0:
-                logger.debug(f"[WorkspaceMonitor-{self.workspace_name}] No errors found")
+                logger.debug("[WorkspaceMonitor-%s] No errors found", self.workspace_name)
                 return {"success": True, "message": "No errors detected", "errors_found": 0, "bugs_submitted": 0}
             
             logger.info(f"[WorkspaceMonitor-{self.workspace_name}] Found {errors_found} error groups, submitting bug reports")
@@ -98,7 +106,7 @@ Workspace: {self.workspace_name}
                     
                     if result.get("success", False):
                         bugs_submitted += 1
-                        logger.debug(f"[WorkspaceMonitor-{self.workspace_name}] Submitted bug report {i + 1}")
+                        logger.debug("[WorkspaceMonitor-%s] Submitted bug report %d", self.workspace_name, i + 1)
                     else:
                         logger.error(f"[WorkspaceMonitor-{self.workspace_name}] Failed to submit bug report {i + 1}: {result.get('error', 'Unknown error')}")
                         
@@ -106,7 +114,7 @@ Workspace: {self.workspace_name}
                     logger.error(f"[WorkspaceMonitor-{self.workspace_name}] Exception submitting bug report {i + 1}: {str(e)}")
             
             message = f"Found {errors_found} errors, submitted {bugs_submitted} bug reports"
-            logger.debug(f"[WorkspaceMonitor-{self.workspace_name}] {message}")
+            logger.debug("[WorkspaceMonitor-%s] %s", self.workspace_name, message)
             
             return {
                 "success": True,
@@ -0,0 +1,272 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# The app's database module needs a URL at import time; no connection is made here
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+def print_test_header(test_name):
+    print(f"\n{Colors.HEADER}{Colors.BOLD}Running test: {test_name}{Colors.ENDC}")
+
+
+def print_success(message):
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_failure(message):
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def assert_equal(actual, expected, message):
+    if actual == expected:
+        print_success(message)
+        return True
+    else:
+        print_failure(f"{message} - Expected: {expected}, Got: {actual}")
+        return False
+
+
+def assert_true(value, message):
+    if value:
+        print_success(message)
+        return True
+    else:
+        print_failure(f"{message} - Value is not True")
+        return False
+
+sys.path.append('.')
+from app.workspace_monitoring.compose_log_watcher import ComposeLogWatcher, ComposeLogFileHandler
+
+# Longest time to wait for the watcher to deliver lines
+WAIT_TIMEOUT = 5
+
+
+class RecordingMonitor:
+    """Stands in for WorkspaceMonitor and records the lines it is given"""
+
+    def __init__(self):
+        self.lines = []
+        self._changed = threading.Condition()
+        # Cleared to make monitor() block, simulating a slow LLM call
+        self.proceed = threading.Event()
+        self.proceed.set()
+        self.busy = threading.Event()
+
+    def monitor(self, lines):
+        if lines:
+            self.busy.set()
+            self.proceed.wait(WAIT_TIMEOUT)
+        with self._changed:
+            self.lines.extend(line.decode() for line in lines)
+            self._changed.notify_all()
+
+    def wait_for(self, count):
+        """Wait until at least count lines have been recorded and return them"""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.lines) >= count, timeout=WAIT_TIMEOUT)
+            return list(self.lines)
+
+
+def append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+@contextmanager
+def watched_log():
+    """Watch a fresh log file from the start; yields the path, the monitor and the watcher"""
+    log_dir = tempfile.mkdtemp(prefix="compose-log-test-")
+    log_file_path = os.path.join(log_dir, "stack.log")
+    watcher = ComposeLogWatcher("test-stack", "test-project")
+    watcher.monitor = RecordingMonitor()
+    watcher.start_watching(log_file_path, start_from_beginning=True)
+    try:
+        yield log_file_path, watcher.monitor, watcher
+    finally:
+        watcher.monitor.proceed.set()
+        watcher.stop_watching()
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+def test_appended_lines():
+    """Appended lines reach the monitor once, blank lines are skipped"""
+    print_test_header("Appended lines")
+    with watched_log() as (log_file_path, monitor, watcher):
+        append(log_file_path, "web-1 | first\n\n   \nweb-1 | second\n")
+        first = monitor.wait_for(2)
+        append(log_file_path, "web-1 | third\n")
+        lines = monitor.wait_for(3)
+        assert all([
+            assert_true(watcher.is_watching, "Watcher started"),
+            assert_equal(first, ["web-1 | first", "web-1 | second"], "First batch delivered without blank lines"),
+            assert_equal(lines, ["web-1 | first", "web-1 | second", "web-1 | third"], "Later append delivered once"),
+        ]), "Some checks failed"
+
+
+def test_line_split_across_writes():
+    """A line written in two parts is delivered whole once its newline arrives"""
+    print_test_header("Line split across two writes")
+    with watched_log() as (log_file_path, monitor, _):
+        append(log_file_path, "web-1 | complete\nweb-1 | par")
+        first = monitor.wait_for(1)
+        # Give the worker time to look at the unterminated tail
+        time.sleep(0.3)
+        held_back = list(monitor.lines)
+        append(log_file_path, "tial line\n")
+        lines = monitor.wait_for(2)
+        assert all([
+            assert_equal(first, ["web-1 | complete"], "Complete line delivered"),
+            assert_equal(held_back, ["web-1 | complete"], "Unterminated line held back"),
+            assert_equal(lines, ["web-1 | complete", "web-1 | partial line"], "Split line delivered whole"),
+        ]), "Some checks failed"
+
+
+def test_rename_rotation():
+    """After a rename rotation the rest of the old file and then the new file are read"""
+    print_test_header("Rename rotation")
+    with watched_log() as (log_file_path, monitor, _):
+        append(log_file_path, "old | one\n")
+        monitor.wait_for(1)
+        append(log_file_path, "old | two\n")
+        os.rename(log_file_path, f"{log_file_path}.1")
+        append(log_file_path, "new | one\n")
+        lines = monitor.wait_for(3)
+        assert all([
+            assert_equal(lines, ["old | one", "old | two", "new | one"], "Old tail and new file delivered in order"),
+        ]), "Some checks failed"
+
+
+def test_copytruncate():
+    """A file truncated in place is read from the start, even once it has regrown past the old offset"""
+    print_test_header("Copytruncate")
+    with watched_log() as (log_file_path, monitor, _):
+        append(log_file_path, "before | one\n")
+        monitor.wait_for(1)
+        # Truncate and refill beyond the old offset before the worker gets to look
+        monitor.proceed.clear()
+        monitor.busy.clear()
+        append(log_file_path, "before | two\n")
+        monitor.busy.wait(WAIT_TIMEOUT)
+        with open(log_file_path, 'r+') as f:
+            f.truncate(0)
+        append(log_file_path, "after | a line longer than everything written before it\n")
+        monitor.proceed.set()
+        lines = monitor.wait_for(3)
+        assert all([
+            assert_equal(lines[:2], ["before | one", "before | two"], "Lines before the truncation delivered"),
+            assert_equal(lines[2:], ["after | a line longer than everything written before it"],
+                         "Refilled file read from the start"),
+        ]), "Some checks failed"
+
+
+def test_close_while_busy():
+    """close() doesn't pull the fd from under a busy worker; the worker releases it when done"""
+    print_test_header("Close while the worker is busy")
+    with watched_log() as (log_file_path, monitor, watcher):
+        handler = watcher.file_handler
+        monitor.proceed.clear()
+        append(log_file_path, "web-1 | slow\n")
+        monitor.busy.wait(WAIT_TIMEOUT)
+        handler.close()
+        fd_kept = handler._fd is not None
+        monitor.proceed.set()
+        handler._worker.join(WAIT_TIMEOUT)
+        assert all([
+            assert_true(fd_kept, "fd still open while the batch is being monitored"),
+            assert_equal(monitor.lines, ["web-1 | slow"], "Busy batch finished"),
+            assert_true(not handler._worker.is_alive(), "Worker exited"),
+            assert_equal(handler._fd, None, "Worker closed the fd"),
+            assert_equal(open(handler.position_file).read(), str(len("web-1 | slow\n")), "Position saved"),
+        ]), "Some checks failed"
+
+
+def test_position_persistence():
+    """A new handler resumes from the saved position, at the start of an unfinished line"""
+    print_test_header("Position persistence")
+    with watched_log() as (log_file_path, monitor, watcher):
+        append(log_file_path, "web-1 | seen\nweb-1 | unfin")
+        monitor.wait_for(1)
+        watcher.stop_watching()
+        saved = open(f"{log_file_path}.position").read()
+
+        append(log_file_path, "ished\nweb-1 | new\n")
+        resumed_monitor = RecordingMonitor()
+        handler = ComposeLogFileHandler(log_file_path, resumed_monitor)
+        try:
+            resumed_position = handler.last_position
+            handler.on_modified(os.path.basename(log_file_path))
+            lines = resumed_monitor.wait_for(2)
+        finally:
+            handler.close()
+        assert all([
+            assert_equal(saved, str(len("web-1 | seen\n")), "Position saved at the start of the unfinished line"),
+            assert_equal(resumed_position, len("web-1 | seen\n"), "New handler resumes from the saved position"),
+            assert_equal(lines, ["web-1 | unfinished", "web-1 | new"], "Only unprocessed lines delivered"),
+        ]), "Some checks failed"
+
+
+def run_all_tests():
+    tests = [
+        test_appended_lines,
+        test_line_split_across_writes,
+        test_rename_rotation,
+        test_copytruncate,
+        test_close_while_busy,
+        test_position_persistence
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except Exception as e:
+            print_failure(f"Test {test.__name__} failed with exception: {str(e)}")
+            results.append(False)
+
+    print("\n" + "="*50)
+    print(f"{Colors.BOLD}Test Results Summary:{Colors.ENDC}")
+    print("="*50)
+
+    all_passed = True
+    for i, result in enumerate(results):
+        test_name = tests[i].__name__
+        if result:
+            print(f"{Colors.OKGREEN}✓ {test_name} - PASSED{Colors.ENDC}")
+        else:
+            all_passed = False
+            print(f"{Colors.FAIL}✗ {test_name} - FAILED{Colors.ENDC}")
+
+    print("="*50)
+    if all_passed:
+        print(f"{Colors.OKGREEN}{Colors.BOLD}All tests passed!{Colors.ENDC}")
+        return 0
+    else:
+        print(f"{Colors.FAIL}{Colors.BOLD}Some tests failed!{Colors.ENDC}")
+        return 1
+
+
+def main():
+    print(f"{Colors.BOLD}Compose Log Watcher Tests{Colors.ENDC}")
+    try:
+        sys.exit(run_all_tests())
+    except Exception as e:
+        print(f"{Colors.FAIL}Error: {str(e)}{Colors.ENDC}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
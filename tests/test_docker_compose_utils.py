@@ -129,11 +129,10 @@ def test_generate_deploy_command():
             project_name=project_name
         )
         
-        expected_cmd_parts = [
+        expected_cmd = [
             "docker", "compose", "-f", compose_file, 
-            "-p", project_name, "up", "-d", "--build"
+            "-p", project_name, "up", "-d"
         ]
-        expected_cmd = " ".join(expected_cmd_parts)
         
         assert_equal(cmd, expected_cmd, "Command generated correctly without env file")
         
@@ -145,13 +144,20 @@ def test_generate_deploy_command():
             env_file_arg=env_file_arg
         )
         
-        expected_cmd_parts_with_env = [
+        expected_cmd_with_env = [
             "docker", "compose", "-f", compose_file, 
-            "-p", project_name, env_file_arg, "up", "-d", "--build"
+            "-p", project_name, "--env-file", ".env", "up", "-d"
         ]
-        expected_cmd_with_env = " ".join(expected_cmd_parts_with_env)
         
         assert_equal(cmd_with_env, expected_cmd_with_env, "Command generated correctly with env file")
+
+        # --build only on request
+        cmd_with_build = DockerComposeUtils.generate_deploy_command(
+            compose_file=compose_file,
+            project_name=project_name,
+            build=True
+        )
+        assert_equal(cmd_with_build, expected_cmd + ["--build"], "Command generated correctly with build")
         
         return True
     except Exception as e:
@@ -0,0 +1,204 @@
+import os
+import sys
+import asyncio
+from unittest import mock
+
+# The app's database module needs a URL at import time; no connection is made here
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+def print_test_header(test_name):
+    print(f"\n{Colors.HEADER}{Colors.BOLD}Running test: {test_name}{Colors.ENDC}")
+
+
+def print_success(message):
+    print(f"{Colors.OKGREEN}✓ {message}{Colors.ENDC}")
+
+
+def print_failure(message):
+    print(f"{Colors.FAIL}✗ {message}{Colors.ENDC}")
+
+
+def assert_equal(actual, expected, message):
+    if actual == expected:
+        print_success(message)
+        return True
+    else:
+        print_failure(f"{message} - Expected: {expected}, Got: {actual}")
+        return False
+
+
+def assert_true(value, message):
+    if value:
+        print_success(message)
+        return True
+    else:
+        print_failure(f"{message} - Value is not True")
+        return False
+
+# Import the utilities after the environment is prepared
+sys.path.append('.')
+from app.docker.docker_compose_remote_vm_utils import DockerComposeRemoteVMUtils
+from app.docker.docker_log_handler import CommandResult, DockerCommandWithLogHandler
+from app.docker.utils import DockerUtils
+from app.models.results.docker_operation_results import DockerContextResult
+
+TEST_USERNAME = "test_user"
+TEST_WORKSPACE = "test_remote_cleanup"
+PROJECT_PATH = f"./tests/{TEST_WORKSPACE}"
+CONTEXT = DockerContextResult(context_name="ws-test-context", ip="10.0.0.4")
+
+
+def run_cleanup(command_results, image_result, keep_build_artifacts=False):
+    """
+    Run the remote cleanup with the docker commands replaced by canned results.
+
+    Returns:
+        The cleanup result, the commands that were run and the image removal calls
+    """
+    commands = []
+    image_calls = []
+
+    async def fake_run(self, cmd, container_name=None):
+        commands.append(cmd)
+        return command_results[len(commands) - 1]
+
+    def fake_remove_project_images(project_path, container_name, docker_command="docker"):
+        image_calls.append(docker_command)
+        return image_result
+
+    os.makedirs(PROJECT_PATH, exist_ok=True)
+    with mock.patch.object(DockerCommandWithLogHandler, "run_docker_commands_with_logging_async", fake_run), \
+            mock.patch.object(DockerUtils, "remove_project_images", staticmethod(fake_remove_project_images)):
+        result = asyncio.run(DockerComposeRemoteVMUtils.run_docker_compose_cleanup(
+            PROJECT_PATH, username=TEST_USERNAME, workspace_name=TEST_WORKSPACE, context=CONTEXT,
+            keep_build_artifacts=keep_build_artifacts
+        ))
+    return result, commands, image_calls
+
+
+def test_cleanup_nothing_deployed():
+    """An empty probe skips the cleanup sequence and still returns a CommandResult"""
+    print_test_header("Cleanup when nothing is deployed")
+    result, commands, image_calls = run_cleanup([CommandResult(success=True, output="")], None)
+    assert all([
+        assert_true(isinstance(result, CommandResult), "Returns a CommandResult"),
+        assert_true(result.success, "Cleanup reported as successful"),
+        assert_equal(len(commands), 1, "Only the probe ran"),
+        assert_equal(image_calls, [], "No image removal attempted"),
+    ]), "Some checks failed"
+
+
+def test_cleanup_full_sequence():
+    """Something deployed: the sh -c sequence and the image removal both feed the result"""
+    print_test_header("Cleanup with a deployed project")
+    result, commands, image_calls = run_cleanup(
+        [CommandResult(success=True, output="abc123"), CommandResult(success=True, output="Removed containers")],
+        CommandResult(success=True, output="Removed images")
+    )
+    assert all([
+        assert_true(isinstance(result, CommandResult), "Returns a CommandResult"),
+        assert_true(result.success, "Cleanup reported as successful"),
+        assert_equal(len(commands), 2, "Probe and cleanup sequence ran"),
+        assert_true("down --volumes --remove-orphans" in commands[1], "Cleanup sequence brings the project down"),
+        assert_equal(image_calls, [f"docker --context {CONTEXT.context_name}"], "Project images removed on the VM"),
+        assert_true("Removed containers" in result.output and "Removed images" in result.output,
+                    "Output combines both steps"),
+    ]), "Some checks failed"
+
+
+def test_cleanup_full_sequence_failures():
+    """Failures of either step make the result unsuccessful and are reported in error"""
+    print_test_header("Cleanup with failing steps")
+    result, _, _ = run_cleanup(
+        [CommandResult(success=True, output="abc123"), CommandResult(success=False, error="daemon unreachable")],
+        CommandResult(success=False, error="image in use")
+    )
+    assert all([
+        assert_true(isinstance(result, CommandResult), "Returns a CommandResult"),
+        assert_equal(result.success, False, "Cleanup reported as failed"),
+        assert_true("daemon unreachable" in result.error, "Command failure reported"),
+        assert_true("image in use" in result.error, "Image removal failure reported"),
+    ]), "Some checks failed"
+
+
+def test_cleanup_keeps_build_artifacts():
+    """keep_build_artifacts skips the image removal and the builder prune"""
+    print_test_header("Cleanup keeping build artifacts")
+    result, commands, image_calls = run_cleanup(
+        [CommandResult(success=True, output="abc123"), CommandResult(success=True, output="Removed containers")],
+        None, keep_build_artifacts=True
+    )
+    assert all([
+        assert_true(result.success, "Cleanup reported as successful"),
+        assert_equal(image_calls, [], "No image removal attempted"),
+        assert_true("builder prune" not in commands[1], "Build cache kept"),
+    ]), "Some checks failed"
+
+
+def clean_up():
+    """Remove the test project directory"""
+    print_test_header("Cleaning up test project")
+    if os.path.exists(PROJECT_PATH):
+        os.rmdir(PROJECT_PATH)
+
+
+def run_all_tests():
+    tests = [
+        test_cleanup_nothing_deployed,
+        test_cleanup_full_sequence,
+        test_cleanup_full_sequence_failures,
+        test_cleanup_keeps_build_artifacts,
+        clean_up
+    ]
+
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(True)
+        except Exception as e:
+            print_failure(f"Test {test.__name__} failed with exception: {str(e)}")
+            results.append(False)
+
+    print("\n" + "="*50)
+    print(f"{Colors.BOLD}Test Results Summary:{Colors.ENDC}")
+    print("="*50)
+
+    all_passed = True
+    for i, result in enumerate(results):
+        test_name = tests[i].__name__
+        if result:
+            print(f"{Colors.OKGREEN}✓ {test_name} - PASSED{Colors.ENDC}")
+        else:
+            all_passed = False
+            print(f"{Colors.FAIL}✗ {test_name} - FAILED{Colors.ENDC}")
+
+    print("="*50)
+    if all_passed:
+        print(f"{Colors.OKGREEN}{Colors.BOLD}All tests passed!{Colors.ENDC}")
+        return 0
+    else:
+        print(f"{Colors.FAIL}{Colors.BOLD}Some tests failed!{Colors.ENDC}")
+        return 1
+
+
+def main():
+    print(f"{Colors.BOLD}Remote Docker Compose Cleanup Tests{Colors.ENDC}")
+    try:
+        sys.exit(run_all_tests())
+    except Exception as e:
+        print(f"{Colors.FAIL}Error: {str(e)}{Colors.ENDC}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()